@@ -12,3 +12,12 @@ __all__ = [
 ]
 
 __version__ = '0.19'
+
+
+def __getattr__(name):
+    # Matplotlib backend config, imported on first use
+    # so `import schemdraw` doesn't import Matplotlib
+    if name == 'mplconfig':
+        from .backends.mpl import config as mplconfig
+        return mplconfig
+    raise AttributeError(f"module 'schemdraw' has no attribute '{name}'")
@@ -0,0 +1,94 @@
+''' Measure "backend". Places the elements and reports their geometry
+    (bounding boxes, anchors, and segments) without rendering anything.
+'''
+
+from __future__ import annotations
+from typing import Any, TYPE_CHECKING
+from collections import ChainMap
+
+from ..types import BBox
+
+if TYPE_CHECKING:
+    from ..elements import Element
+    from ..segments import SegmentType
+
+
+class ElementGeometry:
+    ''' Geometry of one placed element, in drawing coordinates
+
+        Args:
+            element: The placed Element
+
+        Attributes:
+            element: The Element
+            bbox: Bounding box of the element
+            anchors: Dictionary of anchor name: position
+    '''
+    def __init__(self, element: 'Element'):
+        self.element = element
+        self.bbox: BBox = element.get_bbox(transform=True)
+        self.anchors: dict[str, Any] = dict(element.absanchors)
+        self._segments: list[SegmentType] | None = None
+
+    @property
+    def segments(self) -> list['SegmentType']:
+        ''' Element segments transformed into drawing coordinates.
+            Computed on first access.
+        '''
+        if self._segments is None:
+            element = self.element
+            # Exclude drawing params from the chain, same as Drawing.get_segments
+            params = ChainMap(element._userparams, element.elmparams, element.defaults)
+            self._segments = [s.xform(element.transform, **params)
+                              for s in element.segments]
+        return self._segments
+
+    def __repr__(self):
+        return f'<ElementGeometry {type(self.element).__name__} {self.bbox}>'
+
+
+class Figure:
+    ''' Layout-only figure. Collects the geometry of each element
+        instead of drawing it.
+
+        Args:
+            bbox: Bounding box of the drawing
+
+        Attributes:
+            bbox: Bounding box of the drawing (without margin)
+            elements: List of ElementGeometry, one per element, in drawing order
+    '''
+    def __init__(self, bbox: BBox, **kwargs):
+        self.bbox = bbox
+        self.elements: list[ElementGeometry] = []
+
+    def set_bbox(self, bbox: BBox) -> None:
+        ''' Set the bounding box '''
+        self.bbox = bbox
+
+    def bgcolor(self, color: str) -> None:
+        ''' Background color has no effect on measurements '''
+
+    def add_element(self, element: 'Element') -> ElementGeometry:
+        ''' Measure the placed element and add it to the report '''
+        geometry = ElementGeometry(element)
+        self.elements.append(geometry)
+        return geometry
+
+    def clear(self) -> None:
+        ''' Remove everything '''
+        self.elements = []
+
+    def getimage(self, ext: str = 'svg') -> bytes:
+        ''' Not available. The measure canvas does not render. '''
+        raise ValueError('Measure canvas does not produce images.')
+
+    def save(self, fname: str, **kwargs) -> None:
+        ''' Not available. The measure canvas does not render. '''
+        raise ValueError('Measure canvas does not produce images.')
+
+    def show(self) -> None:
+        ''' Nothing to show '''
+
+    def __repr__(self):
+        return f'<schemdraw measure Figure: {len(self.elements)} elements, {self.bbox}>'
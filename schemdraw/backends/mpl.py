@@ -1,20 +1,92 @@
 ''' Matplotlib drawing backend for schemdraw '''
 
 from __future__ import annotations
-from typing import Optional, Sequence, BinaryIO
+from typing import Callable, Optional, Sequence, BinaryIO
+from collections import OrderedDict
 from io import BytesIO
+import hashlib
 import math
+import os
 
 import matplotlib  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
 from matplotlib import font_manager, transforms
+from matplotlib.backend_bases import FigureCanvasBase  # type: ignore
 from matplotlib.patches import Arc, Rectangle, PathPatch, Path # type: ignore
+from matplotlib.collections import Collection, LineCollection, PatchCollection  # type: ignore
+import numpy as np  # type: ignore
 
 from .. import util
 from ..types import Capstyle, Joinstyle, Linestyle, BBox, XY
 
 inline = 'inline' in matplotlib.get_backend()
 
+# Line styles that can be drawn in a LineCollection
+BATCH_LINESTYLES = ['-', '--', ':', '-.', 'solid', 'dashed', 'dotted', 'dashdot']
+
+
+class Config:
+    ''' Configuration options for Matplotlib backend '''
+    _batch: bool = False
+    _tight: bool = True
+    _imagecache: int = 64 * 1024 * 1024
+    _imagedpi: Optional[float] = None
+
+    @property
+    def batch(self) -> bool:
+        ''' Collect lines and shapes into Matplotlib collections, one per
+            run of primitives with the same zorder, rather than adding
+            an artist for every segment. Faster for drawings with many
+            elements.
+        '''
+        return self._batch
+
+    @batch.setter
+    def batch(self, value: bool) -> None:
+        self._batch = value
+
+    @property
+    def tight(self) -> bool:
+        ''' Crop saved images to the extent of the drawn artists, which
+            Matplotlib measures with an extra layout pass over the figure.
+            If False, the image size comes from the drawing bounding box
+            and margin, and is rendered in one pass. Drawings with text
+            extending outside the figure are still cropped tight.
+        '''
+        return self._tight
+
+    @tight.setter
+    def tight(self, value: bool) -> None:
+        self._tight = value
+
+    @property
+    def imagecache(self) -> int:
+        ''' Memory budget, in bytes, for decoded raster images kept
+            between draws. Least recently used images are dropped
+            first. Set to 0 to decode images on every draw.
+        '''
+        return self._imagecache
+
+    @imagecache.setter
+    def imagecache(self, value: int) -> None:
+        self._imagecache = value
+        _trim_image_cache(value)
+
+    @property
+    def imagedpi(self) -> Optional[float]:
+        ''' Downsample raster images that have more pixels than needed
+            to draw them at this resolution, in dots per inch of the
+            drawing scale. None to draw images at full resolution.
+        '''
+        return self._imagedpi
+
+    @imagedpi.setter
+    def imagedpi(self, value: Optional[float]) -> None:
+        self._imagedpi = value
+
+
+config = Config()
+
 
 def fix_capstyle(capstyle):
     ''' Matplotlib uses 'projecting' rather than 'square' for some reason '''
@@ -23,6 +95,84 @@ def fix_capstyle(capstyle):
     return capstyle
 
 
+# (image source, downsample step): decoded image array
+_image_cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+_image_cache_bytes = 0
+
+
+def _trim_image_cache(budget: int) -> None:
+    ''' Drop least recently used images until the cache fits the budget '''
+    global _image_cache_bytes
+    while _image_cache and _image_cache_bytes > budget:
+        _, imdat = _image_cache.popitem(last=False)
+        _image_cache_bytes -= imdat.nbytes
+
+
+def clear_image_cache() -> None:
+    ''' Clear the cache of decoded images '''
+    global _image_cache_bytes
+    _image_cache.clear()
+    _image_cache_bytes = 0
+
+
+def image_cache_info() -> dict:
+    ''' Get number of images, bytes used, and byte budget of the image cache '''
+    return {'images': len(_image_cache),
+            'bytes': _image_cache_bytes,
+            'budget': config.imagecache}
+
+
+def _downsample(imdat: np.ndarray, step: int) -> np.ndarray:
+    ''' Shrink the image by averaging blocks of step x step pixels '''
+    h, w = imdat.shape[0] // step, imdat.shape[1] // step
+    blocks = imdat[:h*step, :w*step].reshape(h, step, w, step, *imdat.shape[2:])
+    small = blocks.mean(axis=(1, 3))
+    if np.issubdtype(imdat.dtype, np.integer):
+        small = small.round()
+    return small.astype(imdat.dtype)
+
+
+def _image_source(image: str | BinaryIO) -> tuple[tuple, str | BytesIO]:
+    ''' Get the cache key identifying the image: path and modification
+        time for file names, or a digest of the data for file pointers
+
+        Returns:
+            key: Cache key for the image
+            image: Image file name, or data to decode
+    '''
+    if isinstance(image, str):
+        stat = os.stat(image)
+        return ('path', os.path.abspath(image), stat.st_mtime_ns, stat.st_size), image
+    image.seek(0)  # May have been read by an earlier draw
+    data = image.read()
+    return ('data', hashlib.sha1(data).hexdigest()), BytesIO(data)
+
+
+def _cached_image(key: tuple, decode: Callable[[], np.ndarray]) -> np.ndarray:
+    ''' Get image array from the cache, or decode it and add it to the cache
+
+        Args:
+            key: Cache key
+            decode: Function to decode the image on a cache miss
+
+        Returns:
+            Image array, shared with the cache so not writable
+    '''
+    global _image_cache_bytes
+    imdat = _image_cache.get(key)
+    if imdat is not None:
+        _image_cache.move_to_end(key)
+        return imdat
+
+    imdat = decode()
+    imdat.flags.writeable = False
+    if imdat.nbytes <= config.imagecache:
+        _image_cache[key] = imdat
+        _image_cache_bytes += imdat.nbytes
+        _trim_image_cache(config.imagecache)
+    return imdat
+
+
 class Figure:
     ''' Schemdraw figure on Matplotlib figure
 
@@ -65,6 +215,13 @@ class Figure:
         # whitespace around contents
         self.margin = kwargs.get('margin', .1) + .03  # Plus half a line width for linecaps
 
+        self.batch = config.batch
+        # zorder: [(batch key, lines or patches)], in batch mode
+        self.batches: dict[float, list[tuple[tuple, list]]] = {}
+        self.clips: dict[BBox, Rectangle] = {}  # Clip rectangle for each clip bbox
+        self.group: Optional[list] = None  # Artists being recorded by startgroup
+        self.groups: list[list] = []  # Recorded artists, one list per group
+
     def set_bbox(self, bbox: BBox):
         ''' Set bounding box, to override Matplotlib's autoscale '''
         self.bbox = bbox
@@ -86,22 +243,127 @@ class Figure:
     def addclip(self, patch, clip):
         ''' Set clipping region for the patch '''
         if clip:
-            cliprect = Rectangle((clip.xmin, clip.ymax),
-                                 abs(clip.xmax-clip.xmin), abs(clip.ymax-clip.ymin),
-                                 transform=self.ax.transData)
+            cliprect = self.clips.get(clip)
+            if cliprect is None:
+                cliprect = Rectangle((clip.xmin, clip.ymax),
+                                     abs(clip.xmax-clip.xmin), abs(clip.ymax-clip.ymin),
+                                     transform=self.ax.transData)
+                self.clips[clip] = cliprect
             patch.set_clip_path(cliprect)
 
+    def addartist(self, artist, clip):
+        ''' Set clipping region for an artist added to the axis,
+            and record it in the current group
+        '''
+        self.addclip(artist, clip)
+        if self.group is not None:
+            self.group.append(artist)
+
+    def startgroup(self) -> None:
+        ''' Start recording the artists added to the axis, so they
+            can be removed together (for example all the artists
+            of one element)
+        '''
+        self.flushbatch()
+        self.group = []
+
+    def endgroup(self) -> None:
+        ''' Stop recording artists and save the group '''
+        self.flushbatch()
+        if self.group is not None:
+            self.groups.append(self.group)
+        self.group = None
+
+    def removegroup(self) -> None:
+        ''' Remove the artists of the last recorded group from the axis '''
+        for artist in self.groups.pop():
+            artist.remove()
+
+    def addbatch(self, key: tuple, item, zorder: float) -> None:
+        ''' Add a line or patch to the batch. Consecutive items with the
+            same key and zorder go in the same collection.
+        '''
+        runs = self.batches.setdefault(zorder, [])
+        if runs and runs[-1][0] == key:
+            runs[-1][1].append(item)
+        else:
+            runs.append((key, [item]))
+
+    def flushbatch(self, zorder: Optional[float] = None) -> None:
+        ''' Add batched items to the axis as collections. Called before
+            adding an unbatched artist with the same zorder, to keep
+            the drawing order.
+
+            Args:
+                zorder: Only flush items with this zorder. Flush all if None.
+        '''
+        zorders = list(self.batches) if zorder is None else [zorder]
+        for z in zorders:
+            for (kind, capstyle, joinstyle, clip), items in self.batches.pop(z, []):
+                if len(items) == 1:
+                    # Matplotlib draws single-path collections as markers,
+                    # snapped to the pixel grid, so add a regular artist.
+                    self.addsingle(kind, capstyle, joinstyle, clip, items[0], z)
+                    continue
+
+                coll: Collection
+                if kind == 'line':
+                    coll = LineCollection([item[0] for item in items],
+                                          colors=[item[1] for item in items],
+                                          linewidths=[item[2] for item in items],
+                                          linestyles=[item[3] for item in items],
+                                          capstyle=capstyle, joinstyle=joinstyle,
+                                          zorder=z)
+                else:
+                    coll = PatchCollection(items, match_original=True,
+                                           capstyle=capstyle, joinstyle=joinstyle,
+                                           zorder=z)
+                self.ax.add_collection(coll)
+                self.addartist(coll, clip)
+
+    def addsingle(self, kind: str, capstyle: str, joinstyle: str,
+                  clip: Optional[BBox], item, zorder: float) -> None:
+        ''' Add one batched item to the axis as its own artist '''
+        if kind == 'line':
+            xy, color, lw, ls = item
+            p, = self.ax.plot([p[0] for p in xy], [p[1] for p in xy],
+                              zorder=zorder, color=color, ls=ls, lw=lw,
+                              solid_capstyle=capstyle, solid_joinstyle=joinstyle)
+        else:
+            p = item
+            self.ax.add_patch(p)
+        self.addartist(p, clip)
+
+    def addpatch(self, patch, clip: Optional[BBox] = None) -> None:
+        ''' Add a patch to the axis, or to the batch '''
+        if self.batch:
+            key = ('patch', patch.get_capstyle(), patch.get_joinstyle(), clip)
+            self.addbatch(key, patch, patch.get_zorder())
+        else:
+            self.ax.add_patch(patch)
+            self.addartist(patch, clip)
+
     def plot(self, x: float, y: float, color: str = 'black', ls: Linestyle = '-',
              lw: float = 2, fill: Optional[str] = None, capstyle: Capstyle = 'round',
              joinstyle: Joinstyle = 'round', clip: Optional[BBox] = None, zorder: int = 2) -> None:
         ''' Plot a path '''
-        p, = self.ax.plot(x, y, zorder=zorder, color=color, ls=ls, lw=lw,
-                          solid_capstyle=fix_capstyle(capstyle),
-                          solid_joinstyle=joinstyle)
-        self.addclip(p, clip)
+        if self.batch and ls in BATCH_LINESTYLES:
+            if ls in ['-', 'solid']:
+                key = ('line', fix_capstyle(capstyle), joinstyle, clip)
+            else:  # Line2D uses different cap and join styles for dashes
+                key = ('line', matplotlib.rcParams['lines.dash_capstyle'],
+                       matplotlib.rcParams['lines.dash_joinstyle'], clip)
+            self.addbatch(key, (list(zip(x, y)), color, lw, ls), zorder)  # type: ignore
+        else:
+            self.flushbatch(zorder)
+            p, = self.ax.plot(x, y, zorder=zorder, color=color, ls=ls, lw=lw,
+                              solid_capstyle=fix_capstyle(capstyle),
+                              solid_joinstyle=joinstyle)
+            self.addartist(p, clip)
         if fill:
+            self.flushbatch(zorder-1)
             p, = self.ax.fill(x, y, color=fill, zorder=zorder-1)
-            self.addclip(p, clip)
+            self.addartist(p, clip)
 
     def text(self, s: str, x: float, y: float, color: str = 'black',
              fontsize: float = 14, fontfamily: str = 'sans-serif',
@@ -116,13 +378,14 @@ class Figure:
             idx = [f.fname for f in font_manager.fontManager.ttflist].index(fontfamily)
             fontfamily = font_manager.fontManager.ttflist[idx].name
 
+        self.flushbatch(zorder)
         t = self.ax.text(x, y, s, transform=self.ax.transData, color=color,
                          fontsize=fontsize, fontfamily=fontfamily,
                          math_fontfamily=mathfont, linespacing=1,
                          rotation=rotation, rotation_mode=rotation_mode,
                          horizontalalignment=halign, verticalalignment=valign,
                          zorder=zorder, clip_on=False)
-        self.addclip(t, clip)
+        self.addartist(t, clip)
 
     def poly(self, verts: Sequence[XY], closed: bool = True,
              color: str = 'black', fill: Optional[str] = None, lw: float = 2, ls: Linestyle = '-', hatch: bool = False,
@@ -133,16 +396,19 @@ class Figure:
                         fc=fill, fill=fill is not None,
                         lw=lw, ls=ls, hatch=h, capstyle=fix_capstyle(capstyle),
                         joinstyle=joinstyle, zorder=zorder)
-        self.ax.add_patch(p)
-        self.addclip(p, clip)
+        if hatch:  # Collections have one hatch for all patches
+            self.flushbatch(zorder)
+            self.ax.add_patch(p)
+            self.addartist(p, clip)
+        else:
+            self.addpatch(p, clip)
 
     def circle(self, center: XY, radius: float, color: str = 'black', fill: Optional[str] = None,
                lw: float = 2, ls: Linestyle = '-', clip: Optional[BBox] = None, zorder: int = 1) -> None:
         ''' Draw a circle '''
         circ = plt.Circle(xy=center, radius=radius, ec=color, fc=fill,
                           fill=fill is not None, lw=lw, ls=ls, zorder=zorder)
-        self.ax.add_patch(circ)
-        self.addclip(circ, clip)
+        self.addpatch(circ, clip)
 
     def arrow(self, xy: XY, theta: float,
               arrowwidth: float = .15, arrowlength: float = .25,
@@ -164,8 +430,7 @@ class Figure:
         p = plt.Polygon((fin1, head, fin2), closed=True, ec='none',
                         fc=color, fill=color is not None,
                         lw=lw, zorder=zorder)
-        self.ax.add_patch(p)
-        self.addclip(p, clip)
+        self.addpatch(p, clip)
 
     def bezier(self, p: Sequence[util.Point], color: str = 'black',
                lw: float = 2, ls: Linestyle = '-', capstyle: Capstyle = 'round', zorder: int = 1,
@@ -191,10 +456,8 @@ class Figure:
             codes = [Path.MOVETO, Path.CURVE3, Path.CURVE3]
         curve = PathPatch(Path(lpoints, codes),
                           fc='none', ec=color, ls=ls, lw=lw,
-                          capstyle=fix_capstyle(capstyle),
-                          transform=self.ax.transData)
-        self.ax.add_patch(curve)
-        self.addclip(curve, clip)
+                          capstyle=fix_capstyle(capstyle))
+        self.addpatch(curve, clip)
 
         if arrow is not None:
             if '<' in arrow:
@@ -245,10 +508,8 @@ class Figure:
                           fill=(fill is not None),
                           capstyle=fix_capstyle(capstyle),
                           joinstyle=joinstyle,
-                          zorder=zorder,
-                          transform=self.ax.transData)
-        self.ax.add_patch(curve)
-        self.addclip(curve, clip)
+                          zorder=zorder)
+        self.addpatch(curve, clip)
 
     def arc(self, center: XY, width: float, height: float,
             theta1: float = 0, theta2: float = 90, angle: float = 0,
@@ -256,13 +517,14 @@ class Figure:
             fill: Optional[str] = None,
             zorder: int = 1, clip: Optional[BBox] = None, arrow: Optional[str] = None) -> None:
         ''' Draw an arc or ellipse, with optional arrowhead '''
+        self.flushbatch(zorder)
 
         if fill is None:
             arc = Arc(center, width=width, height=height, theta1=theta1,
                     theta2=theta2, angle=angle, color=color,
                     lw=lw, ls=ls, zorder=zorder)
             self.ax.add_patch(arc)
-            self.addclip(arc, clip)
+            self.addartist(arc, clip)
         else:
             # Matplotlib doesn't support filled arcs, so make one using Polygon
             while theta1 > theta2:
@@ -281,7 +543,7 @@ class Figure:
                 poly.set_transform(tr+self.ax.transData)
 
             self.ax.add_patch(poly)
-            self.addclip(poly, clip)
+            self.addartist(poly, clip)
 
         if arrow is not None:
             x, y = math.cos(math.radians(theta2)), math.sin(math.radians(theta2))
@@ -305,7 +567,7 @@ class Figure:
 
             a = self.ax.arrow(s[0], s[1], darrow[0], darrow[1], head_width=.15,
                               head_length=.25, color=color, zorder=zorder)
-            self.addclip(a, clip)
+            self.addartist(a, clip)
 
     def image(self, image: str | BinaryIO, xy: XY, width: float, height: float,
               rotate: float = 0, zorder: int = 1, imgfmt: Optional[str] = None):
@@ -328,23 +590,53 @@ class Figure:
             pass
 
         try:
-            imdat = plt.imread(image)
+            source, imgdata = _image_source(image)
+            imdat = _cached_image((source, 1), lambda: plt.imread(imgdata))
         except SyntaxError as ex:
             raise ValueError('SVG images not supported in matplotlib backend') from ex
 
+        if config.imagedpi and not self.userfig:
+            # Pixels needed to draw the image at imagedpi
+            pxwidth = abs(width) * self.inches_per_unit * config.imagedpi
+            pxheight = abs(height) * self.inches_per_unit * config.imagedpi
+            step = 1  # Drawn with zero size, keep the full image
+            if pxwidth > 0 and pxheight > 0:
+                step = int(min(imdat.shape[1] / pxwidth, imdat.shape[0] / pxheight))
+            if step > 1:
+                full = imdat
+                imdat = _cached_image((source, step), lambda: _downsample(full, step))
+
+        self.flushbatch(zorder)
         tr = transforms.Affine2D().rotate_deg(rotate).translate(xy[0], xy[1])
         im = self.ax.imshow(imdat, extent=(0, width, 0, height), zorder=zorder)
         im.set_transform(tr+self.ax.transData)
+        self.addartist(im, None)
 
     def save(self, fname: str, transparent: bool = True, dpi: float = 72) -> None:
         ''' Save the figure to a file '''
         fig = self.getfig()
         fig.subplots_adjust(0, 0, 1, 1)
-        fig.savefig(fname,
-                    bbox_inches='tight',
-                    transparent=transparent, dpi=dpi,
-                    bbox_extra_artists=self.ax.get_default_bbox_extra_artists(),
-                    pad_inches=0)
+        fig.savefig(fname, transparent=transparent, dpi=dpi,
+                    **self.extentargs())
+
+    def extentargs(self) -> dict:
+        ''' Get savefig arguments for the image extent '''
+        if not self.userfig and not config.tight and not self.textoverflow():
+            # Figure size and axis limits already match the drawing bbox
+            return {}
+        return {'bbox_inches': 'tight',
+                'bbox_extra_artists': self.ax.get_default_bbox_extra_artists(),
+                'pad_inches': 0}
+
+    def textoverflow(self) -> bool:
+        ''' Check if any text extends more than a pixel outside the figure '''
+        figbox = self.fig.bbox.padded(1)
+        for t in self.ax.texts:
+            ext = t.get_window_extent()
+            if (ext.x0 < figbox.x0 or ext.x1 > figbox.x1 or
+                    ext.y0 < figbox.y0 or ext.y1 > figbox.y1):
+                return True
+        return False
 
     def getfig(self):
         ''' Get the Matplotlib figure '''
@@ -355,7 +647,12 @@ class Figure:
             self.plot((self.bbox.xmin-self.margin, self.bbox.xmin-self.margin, self.bbox.xmax+self.margin, self.bbox.xmax+self.margin, self.bbox.xmin-self.margin),
                       (self.bbox.ymin-self.margin, self.bbox.ymax+self.margin, self.bbox.ymax+self.margin, self.bbox.ymin-self.margin, self.bbox.ymin-self.margin),
                       color='black', lw=.5)
+        self.flushbatch()
+        self.setlimits()
+        return self.fig
 
+    def setlimits(self) -> None:
+        ''' Set axis limits and figure size from the bounding box '''
         if not self.userfig:
             x1, x2 = self.bbox.xmin - self.margin, self.bbox.xmax + self.margin
             y1, y2 = self.bbox.ymin - self.margin, self.bbox.ymax + self.margin
@@ -371,22 +668,32 @@ class Figure:
                                                      self.inches_per_unit*h)
             except ValueError:
                 pass  # infinite size (no elements yet)
-        return self.fig
+
+    def refresh(self) -> None:
+        ''' Update the axis limits and redraw the canvas when idle,
+            without rendering an image. Used in interactive mode.
+        '''
+        self.flushbatch()
+        self.setlimits()
+        if type(self.fig.canvas).draw_idle is not FigureCanvasBase.draw_idle:
+            # GUI canvases defer the draw to their event loop. Others
+            # (Agg, inline) would render immediately, with nothing to show.
+            self.fig.canvas.draw_idle()
 
     def getimage(self, ext='svg'):
         ''' Get the image as SVG or PNG bytes array '''
         fig = self.getfig()
         output = BytesIO()
-        fig.savefig(output, format=ext,
-                    bbox_inches='tight',
-                    bbox_extra_artists=self.ax.get_default_bbox_extra_artists(),
-                    pad_inches=0)
+        fig.savefig(output, format=ext, **self.extentargs())
 
         return output.getvalue()
 
     def clear(self) -> None:
         ''' Remove everything '''
         self.ax.clear()
+        self.batches = {}
+        self.group = None
+        self.groups = []
 
     def __repr__(self):
         if plt.isinteractive():
@@ -2,35 +2,56 @@
 
 from __future__ import annotations
 
-from typing import Sequence, Optional, BinaryIO
+from typing import Sequence, Optional, BinaryIO, TextIO
 from xml.etree import ElementTree as ET
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from itertools import groupby
 
+import io
+import copy
+import hashlib
 import os
 import sys
+import shutil
 import subprocess
 import tempfile
 import math
 import warnings
 import base64
-
-try:
-    import ziamath  # type: ignore
-except ImportError:
-    ziamath = None  # type: ignore
+import struct
+from functools import lru_cache
+from importlib.util import find_spec
 
 from ..types import Capstyle, Joinstyle, Linestyle, BBox, Halign, Valign, RotationMode, TextMode, XY
 from ..util import Point
+from ..transform import Transform
 from . import svgtext
 from .svgunits import parse_size_to_px, PT_PER_IN, PX_PER_PT
 
 
 LINE_WIDTH = 2     # Default line width is 2 points
+TEXT_SIZE_CACHE_SIZE = 4096  # Number of text_size results to remember
+STREAM_BUFFER_SIZE = 2**20  # Characters of each zorder buffer held in memory before spilling to disk
+IMAGE_CACHE_SIZE = 32  # Number of parsed or encoded images to remember
+
+# ziamath is slow to import. Check whether it's installed here,
+# but don't import it until text is measured or drawn.
+HAVE_ZIAMATH = find_spec('ziamath') is not None
+
+
+def _ziamath():
+    ''' Import ziamath on first use '''
+    import ziamath  # type: ignore
+    return ziamath
 
 
 class Config:
     ''' Configuration options for SVG backend '''
-    _text: TextMode = 'path' if ziamath is not None else 'text'
+    _text: TextMode = 'path' if HAVE_ZIAMATH else 'text'
+    _stream: bool = False
+    _cssclasses: bool = False
+    _mergepaths: bool = False
+    _symbols: bool = False
 
     @property
     def text(self) -> TextMode:
@@ -47,35 +68,92 @@ class Config:
 
     @text.setter
     def text(self, value: TextMode) -> None:
-        if value == 'path' and ziamath is None:
+        if value == 'path' and not HAVE_ZIAMATH:
             raise ValueError('Path mode requires ziamath package')
         if value not in ['path', 'text']:
             raise ValueError('text mode must be "path" or "text".')
         self._text = value
+        clear_text_size_cache()
+
+    @property
+    def stream(self) -> bool:
+        ''' Write the markup of each SVG element to a temporary
+            buffer for its zorder as it is drawn, rather than
+            building an XML tree of the whole drawing. Output
+            is the same, but memory use does not grow with
+            the number of elements. Use for very large drawings.
+        '''
+        return self._stream
+
+    @stream.setter
+    def stream(self, value: bool) -> None:
+        self._stream = value
+
+    @property
+    def cssclasses(self) -> bool:
+        ''' Put element styles in CSS classes in a <style> tag
+            rather than repeating the style attribute on every
+            element. Each unique style becomes one class, reducing
+            the SVG size for large drawings. Class names are unique
+            to each figure so multiple SVGs can share an HTML page.
+        '''
+        return self._cssclasses
+
+    @cssclasses.setter
+    def cssclasses(self, value: bool) -> None:
+        self._cssclasses = value
+
+    @property
+    def mergepaths(self) -> bool:
+        ''' Merge consecutive lines with the same style, clip,
+            and zorder into a single <path> element, reducing
+            the number of SVG elements in drawings with many
+            wires. Disable to draw every line as its own <path>.
+        '''
+        return self._mergepaths
+
+    @mergepaths.setter
+    def mergepaths(self, value: bool) -> None:
+        self._mergepaths = value
+
+    @property
+    def symbols(self) -> bool:
+        ''' Draw the shape of each element once in <defs>, and
+            place every element with the same shape as a <use>
+            with its own transform. Labels are still drawn
+            separately for each element. Reduces the SVG size
+            for drawings with many identical elements. Each
+            element is placed at a single zorder.
+        '''
+        return self._symbols
+
+    @symbols.setter
+    def symbols(self, value: bool) -> None:
+        self._symbols = value
 
     @property
     def svg2(self) -> bool:
         ''' Use SVG2.0. Disable for better browser compatibility
             at the expense of SVG size.
         '''
-        if ziamath is not None:
-            return ziamath.config.svg2
+        if HAVE_ZIAMATH:
+            return _ziamath().config.svg2
         return True
 
     @svg2.setter
     def svg2(self, value: bool) -> None:
-        if ziamath is None:
+        if not HAVE_ZIAMATH:
             raise ValueError('SVG2 mode requires ziamath package')
-        ziamath.config.svg2 = value
+        _ziamath().config.svg2 = value
 
     @property
     def precision(self) -> float:
         ''' Decimal precision for SVG coordinates '''
-        return ziamath.config.precision
+        return _ziamath().config.precision
 
     @precision.setter
     def precision(self, value: float) -> None:
-        ziamath.config.precision = value
+        _ziamath().config.precision = value
 
 
 config = Config()
@@ -160,7 +238,7 @@ def text_size(text: str,
               size: float = 14) -> tuple[float, float, float]:
     ''' Get size of text. Size will be exact bounding box if ziamath installed and
         using path text mode. Otherwise size will be estimated based on character
-        widths.
+        widths. Results are cached (see `text_size_cache_info`).
 
         Args:
             text: string to calculate
@@ -172,18 +250,86 @@ def text_size(text: str,
     '''
     if font is None or font.lower() in ['sans-serif', 'Arial']:
         font = 'sans'
+    return _text_size(text, font, mathfont, size, config.text)
 
-    if (ziamath and
+
+@lru_cache(maxsize=TEXT_SIZE_CACHE_SIZE)
+def _text_size(text: str, font: str, mathfont: Optional[str],
+               size: float, textmode: TextMode) -> tuple[float, float, float]:
+    ''' Uncached text_size. textmode is only used as part of the cache key. '''
+    if (HAVE_ZIAMATH and
         (mathfont is None or os.path.exists(mathfont))):
         if text == '':
             return (0, 0, 0)
 
-        m = ziamath.Text(text, size=size, mathstyle=font, textfont=font, mathfont=mathfont)
+        m = _ziamath().Text(text, size=size, mathstyle=font, textfont=font, mathfont=mathfont)
         return (*m.getsize(), m.getyofst())
 
     return svgtext.text_approx_size(text, font=font, size=size)
 
 
+def text_size_cache_info():
+    ''' Get hits, misses, maxsize, and currsize of the text_size cache '''
+    return _text_size.cache_info()
+
+
+def clear_text_size_cache() -> None:
+    ''' Clear the text_size cache. Call after changing fonts
+        or character widths so text is measured again.
+    '''
+    _text_size.cache_clear()
+
+
+# (digest, format): parsed SVG root and its width in px, or base64 raster data
+_image_cache: OrderedDict[tuple[str, str], tuple[ET.Element, float] | str] = OrderedDict()
+
+
+def _decode_image(imgdat: bytes, imgfmt: str, digest: str) -> tuple[ET.Element, float] | str:
+    ''' Parse SVG image data, or base64-encode raster image data.
+        Results are cached by content digest. The parsed SVG is
+        shared, so copy it before modifying.
+    '''
+    key = (digest, imgfmt)
+    decoded = _image_cache.get(key)
+    if decoded is not None:
+        _image_cache.move_to_end(key)
+        return decoded
+
+    if imgfmt == 'svg':
+        imageelm = ET.fromstring(imgdat.decode())
+        decoded = (imageelm, parse_size_to_px(imageelm.get('width', '0')))
+    else:
+        decoded = base64.encodebytes(imgdat).decode()
+    _image_cache[key] = decoded
+    if len(_image_cache) > IMAGE_CACHE_SIZE:
+        _image_cache.popitem(last=False)
+    return decoded
+
+
+def _raster_size(imgdat: bytes) -> Optional[tuple[int, int]]:
+    ''' Get width and height in pixels from the header of PNG,
+        GIF, or JPEG image data, or None for other formats
+    '''
+    if imgdat[:8] == b'\x89PNG\r\n\x1a\n' and imgdat[12:16] == b'IHDR':
+        return struct.unpack('>II', imgdat[16:24])
+    if imgdat[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', imgdat[6:10])
+    if imgdat[:2] == b'\xff\xd8':
+        i = 2
+        while i + 9 < len(imgdat) and imgdat[i] == 0xFF:
+            marker = imgdat[i+1]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):  # Start of frame
+                height, width = struct.unpack('>HH', imgdat[i+5:i+9])
+                return width, height
+            i += 2 + struct.unpack('>H', imgdat[i+2:i+4])[0]
+    return None
+
+
+def clear_image_cache() -> None:
+    ''' Clear the cache of parsed and encoded images '''
+    _image_cache.clear()
+
+
 class Figure:
     ''' Schemdraw figure drawn directly to SVG
 
@@ -195,11 +341,18 @@ class Figure:
     # Keep track of clipid's across all figures so they don't conflict
     # when multiple figures are in one Jupyter notebook/html file.
     total_clips = 0
+    # Same for prefixes of style class names, since a <style> tag applies
+    # to the whole html page
+    total_stylesheets = 0
+    # And ids of symbols
+    total_symbols = 0
 
     def __init__(self, bbox: BBox, **kwargs):
-        self.svgelements: list[tuple[int, ET.Element]] = []  # (zorder, element)
+        self.svgelements: list[tuple[float, ET.Element]] = []  # (zorder, element)
         self.hatch: bool = False
         self.clips: dict[BBox, int] = {}
+        self.styles: dict[str, str] = {}  # style: class name, in cssclasses mode
+        self.cssprefix: Optional[str] = None
         self.showbbox = kwargs.get('showbbox', False)
         self.scale = PT_PER_IN * kwargs.get('inches_per_unit', 0.5)   # Converts drawing units to points
         self.margin = kwargs.get('margin', 0.1) + LINE_WIDTH/PT_PER_IN  # Margin in drawing units. Add line width (2pt) to include linecaps in bbox
@@ -207,6 +360,15 @@ class Figure:
         self._bgcolor: Optional[str] = None
         self._need_xlink = False
         self.svgcanvas = kwargs.get('svg')
+        # Serialized markup by zorder, when streaming
+        self.stream = config.stream and self.svgcanvas is None
+        self.zbuffers: dict[float, tempfile.SpooledTemporaryFile] = {}
+        self.namespaces: dict[str, str] = {}  # uri: prefix, to declare on the root when streaming
+        # zorder: (merge key, path, path data), in mergepaths mode
+        self.openpaths: dict[float, tuple[tuple, ET.Element, list[str]]] = {}
+        self.usesymbols = config.symbols
+        self.symbolids: dict[str, str] = {}  # symbol markup: id, in symbols mode
+        self.imageids: dict[tuple, str] = {}  # image key: id of its <defs> entry
 
     def set_bbox(self, bbox: BBox) -> None:
         ''' Set the bounding box '''
@@ -229,6 +391,144 @@ class Figure:
         ''' Set background color of drawing '''
         self._bgcolor = color
 
+    def addelement(self, et: ET.Element, zorder: float, mergekey: Optional[tuple] = None) -> None:
+        ''' Add a finished SVG element to the figure. An element with a
+            mergekey is left open so following paths with the same
+            key and zorder can be merged into it.
+        '''
+        pending = self.openpaths.pop(zorder, None)
+        if pending is not None:
+            self._closepath(*pending[1:], zorder)
+
+        if mergekey is not None:
+            self.openpaths[zorder] = (mergekey, et, [et.get('d', '')])
+            if self.stream:
+                return  # Written once closed
+
+        if not self.stream:
+            self.svgelements.append((zorder, et))
+        else:
+            self._writeelement(et, zorder)
+
+    def closepaths(self) -> None:
+        ''' Stop merging into open paths '''
+        for zorder, (_, et, data) in self.openpaths.items():
+            self._closepath(et, data, zorder)
+        self.openpaths = {}
+
+    def _closepath(self, et: ET.Element, data: list[str], zorder: float) -> None:
+        ''' Set the merged path data on an open path, and write it when streaming '''
+        if len(data) > 1:
+            et.set('d', ' '.join(data))
+        if self.stream:
+            self._writeelement(et, zorder)
+
+    def _writeelement(self, et: ET.Element, zorder: float) -> None:
+        ''' Serialize the element to the buffer for its zorder '''
+        buffer = self.zbuffers.get(zorder)
+        if buffer is None:
+            buffer = tempfile.SpooledTemporaryFile(
+                max_size=STREAM_BUFFER_SIZE, mode='w+', encoding='utf-8', newline='')
+            self.zbuffers[zorder] = buffer
+        self._prefix_namespaces(et)
+        buffer.write(ET.tostring(et, encoding='unicode'))
+
+    def _prefix_namespaces(self, et: ET.Element) -> None:
+        ''' Replace {uri}name qualified names (from embedded SVG images)
+            with prefix:name, assigning prefixes the same way ElementTree
+            does when serializing the whole tree, so the prefixes can be
+            declared once on the root.
+        '''
+        def qname(name: str) -> str:
+            if name[:1] != '{':
+                return name
+            uri, local = name[1:].rsplit('}', 1)
+            prefix = self.namespaces.get(uri)
+            if prefix is None:
+                prefix = ET._namespace_map.get(uri)  # type: ignore  # Registered prefixes
+                if prefix is None:
+                    prefix = f'ns{len(self.namespaces)}'
+                if prefix != 'xml':
+                    self.namespaces[uri] = prefix
+            return f'{prefix}:{local}' if prefix else local
+
+        for elm in et.iter():
+            if isinstance(elm.tag, str):
+                elm.tag = qname(elm.tag)
+            if any(k[:1] == '{' for k in elm.attrib):
+                attrib = [(qname(k), v) for k, v in elm.attrib.items()]
+                elm.attrib.clear()
+                elm.attrib.update(attrib)
+
+    def addsymbol(self, segments: Sequence, transform: Transform, params) -> None:
+        ''' Draw the segments as instances of symbols. The segments
+            are drawn untransformed, and put in <defs> the first time
+            the same markup is seen. The instance is a <use> with the
+            transform as an SVG transform. Segments with different zorders
+            go in separate symbols, each used at its own zorder.
+
+            Args:
+                segments: Segments to draw in the symbol
+                transform: Transform placing the segments in the drawing
+                params: Default style parameters for the segments
+        '''
+        saved = self.svgelements, self.openpaths, self.stream
+        self.svgelements, self.openpaths, self.stream = [], {}, False
+        try:
+            for segment in segments:
+                segment.draw(self, Transform(0, (0, 0)), **params)
+            self.closepaths()
+            drawn = sorted(self.svgelements, key=lambda x: x[0])
+        finally:
+            self.svgelements, self.openpaths, self.stream = saved
+        if not drawn:
+            return
+
+        # Same steps as Transform.transform, in SVG coordinates (y down)
+        xform = []
+        shiftx, shifty = self.xform(*transform.shift)
+        if shiftx or shifty:
+            xform.append(f'translate({shiftx} {shifty})')
+        if transform.theta % 360:
+            xform.append(f'rotate({-transform.theta})')
+        localx, localy = self.xform(*transform.localshift)
+        if localx or localy:
+            xform.append(f'translate({localx} {localy})')
+
+        for zorder, group in groupby(drawn, key=lambda x: x[0]):
+            ets = [et for _, et in group]
+            markup = ''.join(ET.tostring(et, encoding='unicode') for et in ets)
+            symid = self.symbolids.get(markup)
+            if symid is None:
+                symid = f'sym{Figure.total_symbols}'
+                Figure.total_symbols += 1
+                self.symbolids[markup] = symid
+                defs = ET.Element('defs')
+                symbol = ET.SubElement(defs, 'g')
+                symbol.set('id', symid)
+                symbol.extend(ets)
+                self.addelement(defs, 0)
+
+            et = ET.Element('use')
+            et.set('xlink:href', f'#{symid}')
+            self._need_xlink = True
+            if xform:
+                et.set('transform', ' '.join(xform))
+            self.addelement(et, zorder)
+
+    def setstyle(self, et: ET.Element, style: str) -> None:
+        ''' Set the element style inline, or as a CSS class in cssclasses mode '''
+        if not config.cssclasses:
+            et.set('style', style)
+            return
+
+        if style not in self.styles:
+            if self.cssprefix is None:
+                self.cssprefix = f'sd{Figure.total_stylesheets}'
+                Figure.total_stylesheets += 1
+            self.styles[style] = f'{self.cssprefix}_{len(self.styles)}'
+        et.set('class', self.styles[style])
+
     def addclip(self, et: ET.Element, bbox: Optional[BBox]):
         ''' Add clip path to the element '''
         if bbox is not None:
@@ -243,7 +543,7 @@ class Figure:
                 x1, y1 = self.xform(bbox.xmax, bbox.ymax)
                 clip = ET.fromstring(f'''<defs><clipPath id="clip{clipid}"><rect x="{x0-1}" y="{y0-1}"'''
                                      f''' width="{x1-x0+2}" height="{y1-y0+2}" /></clipPath></defs>''')
-                self.svgelements.append((0, clip))
+                self.addelement(clip, 0)
             et.set('clip-path', f'url(#clip{clipid})')
 
     def plot(self, x: XY, y: XY,
@@ -263,11 +563,21 @@ class Figure:
             d += f'{xx},{yy} '
 
         d = d.strip()
+        style = getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle,
+                         joinstyle=joinstyle, fill=fill)
+        mergekey = None
+        if config.mergepaths and str(fill).lower() == 'none':
+            # Unfilled, so the subpaths draw the same as separate paths
+            mergekey = (style, clip)
+            pending = self.openpaths.get(zorder)
+            if pending is not None and pending[0] == mergekey:
+                pending[2].append(d)  # Joined once when the path is closed
+                return
+
         et.set('d', d)
-        et.set('style', getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle,
-                                 joinstyle=joinstyle, fill=fill))
+        self.setstyle(et, style)
         self.addclip(et, clip)
-        self.svgelements.append((zorder, et))
+        self.addelement(et, zorder, mergekey)
 
     def text(self, s: str, x: float, y: float, color: str = 'black',
              fontsize: float = 14, fontfamily: str = 'sans',
@@ -292,9 +602,9 @@ class Figure:
             nlines = len(s.splitlines())
             y0 -= (nlines-1)*fontsize
 
-        if ziamath and config.text == 'path':
+        if HAVE_ZIAMATH and config.text == 'path':
             texttag = ET.Element('g')
-            ztext = ziamath.Text(s, textfont=fontfamily, mathfont=mathfont,
+            ztext = _ziamath().Text(s, textfont=fontfamily, mathfont=mathfont,
                                  size=fontsize, linespacing=1, color=color,
                                  rotation=rotation, rotation_mode=rotation_mode)
             ztext.drawon(texttag, x0, y0,
@@ -306,7 +616,7 @@ class Figure:
                                          testmode=False)
         
         self.addclip(texttag, clip)
-        self.svgelements.append((zorder, texttag))
+        self.addelement(texttag, zorder)
 
     def poly(self, verts: Sequence[XY], closed: bool = True,
              color: str = 'black', fill: str = 'none', lw: float = 2,
@@ -319,10 +629,10 @@ class Figure:
             xx, yy = self.xform(xx, yy)
             points += f'{xx},{yy} '
         et.set('points', points)
-        et.set('style', getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle,
-                                 joinstyle=joinstyle, fill=fill, hatch=hatch))
+        self.setstyle(et, getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle,
+                                   joinstyle=joinstyle, fill=fill, hatch=hatch))
         self.addclip(et, clip)
-        self.svgelements.append((zorder, et))
+        self.addelement(et, zorder)
         if hatch:
             self.hatch = True
 
@@ -336,9 +646,9 @@ class Figure:
         et.set('cx', str(x))
         et.set('cy', str(y))
         et.set('r', str(radius))
-        et.set('style', getstyle(color=color, lw=lw, ls=ls, fill=fill))
+        self.setstyle(et, getstyle(color=color, lw=lw, ls=ls, fill=fill))
         self.addclip(et, clip)
-        self.svgelements.append((zorder, et))
+        self.addelement(et, zorder)
 
     def arrow(self, xy: XY, theta: float,
               arrowwidth: float = .15, arrowlength: float = .25,
@@ -368,10 +678,10 @@ class Figure:
         d += f'L {fin1[0]} {fin1[1]} '
         d += f'L {fin2[0]} {fin2[1]} Z'
         et1.set('d', d)
-        et1.set('style', getstyle(color=color, lw=0, capstyle='butt',
-                                  joinstyle='miter', fill=color))
+        self.setstyle(et1, getstyle(color=color, lw=0, capstyle='butt',
+                                    joinstyle='miter', fill=color))
         self.addclip(et1, clip)
-        self.svgelements.append((zorder, et1))
+        self.addelement(et1, zorder)
 
     def bezier(self, p: Sequence[Point], color: str = 'black',
                lw: float = 2, ls: Linestyle = '-', capstyle: Capstyle = 'round', zorder: int = 1,
@@ -398,9 +708,9 @@ class Figure:
         for p0 in lpoints[1:]:
             path += f' {p0[0]} {p0[1]}'
         et.set('d', path)
-        et.set('style', getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle))
+        self.setstyle(et, getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle))
         self.addclip(et, clip)
-        self.svgelements.append((zorder, et))
+        self.addelement(et, zorder)
 
         if arrow is not None:
             # Note: using untransformed bezier control points here
@@ -439,10 +749,10 @@ class Figure:
                 dstrs.append(f'{y}')
         et = ET.Element('path')
         et.set('d', ' '.join(dstrs))
-        et.set('style', getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle,
-                                 joinstyle=joinstyle, fill=fill))
+        self.setstyle(et, getstyle(color=color, ls=ls, lw=lw, capstyle=capstyle,
+                                   joinstyle=joinstyle, fill=fill))
         self.addclip(et, clip)
-        self.svgelements.append((zorder, et))
+        self.addelement(et, zorder)
 
     def arc(self, center: XY, width: float, height: float,
             theta1: float = 0, theta2: float = 90, angle: float = 0,
@@ -488,9 +798,9 @@ class Figure:
             et.set('ry', str(height/2))
             if angle != 0:
                 et.set('transform', f'rotate({angle} {centerx} {centery})')
-            et.set('style', getstyle(color=color, ls=ls, lw=lw, fill=fill))
+            self.setstyle(et, getstyle(color=color, ls=ls, lw=lw, fill=fill))
             self.addclip(et, clip)
-            self.svgelements.append((zorder, et))
+            self.addelement(et, zorder)
 
         else:
             flags = '1 1' if abs(t2-t1) >= math.pi else '0 1'
@@ -498,9 +808,9 @@ class Figure:
             d = f'M {startx} {starty}'
             d += f' a {width/2} {height/2} {angle} {flags} {dx} {dy}'
             et.set('d', d)
-            et.set('style', getstyle(color=color, ls=ls, lw=lw, fill=fill))
+            self.setstyle(et, getstyle(color=color, ls=ls, lw=lw, fill=fill))
             self.addclip(et, clip)
-            self.svgelements.append((zorder, et))
+            self.addelement(et, zorder)
 
         if arrow is not None:
             # Note: This arrowhead's TAIL is located at the endpoint of the
@@ -572,46 +882,123 @@ class Figure:
         x0, y0 = self.xform(*xy)
         y0 -= height
 
-        if imgfmt == 'svg':
-            et = ET.Element('g')
-            imageelm = ET.fromstring(imgdat.decode())
-            imgwidth = parse_size_to_px(imageelm.get('width', '0'))
+        # The image is put in <defs> once, and each instance is a <use>
+        digest = hashlib.sha1(imgdat).hexdigest()
+        et = ET.Element('use')
+        self._need_xlink = True
+        decoded = _decode_image(imgdat, imgfmt, digest)
+        if isinstance(decoded, tuple):  # Parsed SVG
+            svgelm, imgwidth = decoded
+            et.set('xlink:href', f'#{self._imagedef(("svg", digest), svgelm)}')
             s = width / imgwidth
             xform = f'translate({x0}, {y0}) scale({s})'
             if rotate:
                 xform = f'rotate({-rotate} {x0} {y0+height}) ' + xform
             et.set('transform', xform)
-            et.append(imageelm)
-        else:  # Raster images
-            image_b64 = base64.encodebytes(imgdat).decode()
-            et = ET.Element('image')
-            et.set('xlink:href', f'data:image/{imgfmt};base64,{image_b64}')
-            self.svgelements.append((zorder, et))
-            self._need_xlink = True
-
-            et.set('x', str(x0))
-            et.set('y', str(y0))
-            et.set('width', str(width))
-            et.set('height', str(height))
+        else:  # Base64-encoded raster image
+            imageelm = ET.Element('image')
+            imageelm.set('xlink:href', f'data:image/{imgfmt};base64,{decoded}')
+            imageelm.set('x', '0')
+            imageelm.set('y', '0')
+            size = _raster_size(imgdat)
+            if size is not None and all(size):
+                # Defined at its own size, and scaled and centered in
+                # the width x height box the same as the default
+                # preserveAspectRatio, so every size shares one entry
+                imgwidth, imgheight = size
+                imageelm.set('width', str(imgwidth))
+                imageelm.set('height', str(imgheight))
+                et.set('xlink:href', f'#{self._imagedef((imgfmt, digest), imageelm)}')
+                s = min(width / imgwidth, height / imgheight)
+                dx = (width - imgwidth*s) / 2
+                dy = (height - imgheight*s) / 2
+                xform = f'translate({x0+dx}, {y0+dy}) scale({s})'
+            else:
+                imageelm.set('width', str(width))
+                imageelm.set('height', str(height))
+                et.set('xlink:href', f'#{self._imagedef((imgfmt, digest, width, height), imageelm)}')
+                xform = f'translate({x0}, {y0})'
             if rotate:
-                et.set('transform', f'rotate({-rotate} {x0} {y0+height})')
-        self.svgelements.append((zorder, et))
+                xform = f'rotate({-rotate} {x0} {y0+height}) ' + xform
+            et.set('transform', xform)
+        self.addelement(et, zorder)
+
+    def _imagedef(self, key: tuple, imageelm: ET.Element) -> str:
+        ''' Get the id of the image's <defs> entry, adding the
+            entry the first time the image is drawn
+
+            Args:
+                key: Content digest and format of the image, and size for rasters of unknown size
+                imageelm: Image SVG element. Copied, since it may be
+                    shared with other figures.
+        '''
+        imgid = self.imageids.get(key)
+        if imgid is None:
+            # Id comes from the content, so output is repeatable. Figures on
+            # the same page only share an id if they share the image.
+            imgid = 'img' + hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+            self.imageids[key] = imgid
+            defs = ET.Element('defs')
+            group = ET.SubElement(defs, 'g')
+            group.set('id', imgid)
+            group.append(copy.deepcopy(imageelm))
+            self.addelement(defs, 0)
+        return imgid
 
     def save(self, fname: str, **kwargs) -> None:
         ''' Save the figure to a file '''
-        svg = self.getimage().decode()
         ext = os.path.splitext(fname)[1]
         if ext.lower() != '.svg':
             raise ValueError('SVG backend only supports saving SVG format figures.')
         with open(fname, 'w', encoding='utf-8') as f:
-            f.write(svg)
+            self.write(f)
+
+    def write(self, f: TextIO) -> None:
+        ''' Write the SVG to a text file-like object. When streaming, the
+            markup is copied from the zorder buffers without building
+            the XML tree or the full SVG string.
+        '''
+        if not self.stream:
+            f.write(self.getimage().decode())
+            return
+
+        self.closepaths()
+        root = ET.tostring(self._svgroot(), encoding='unicode')
+        if not self.zbuffers:
+            f.write(root)
+            return
+
+        if root.endswith(' />'):  # Root with no children
+            f.write(root[:-3] + '>')
+        else:
+            f.write(root[:-len('</svg>')])
+        for zorder in sorted(self.zbuffers):
+            buffer = self.zbuffers[zorder]
+            buffer.seek(0)
+            shutil.copyfileobj(buffer, f)  # Leaves buffer at the end for further drawing
+        f.write('</svg>')
 
     def getsvg(self) -> ET.Element:
         ''' Get the image as SVG XML Tree '''
+        if self.stream:
+            return ET.fromstring(self.getimage())
+
+        self.closepaths()
+        svg = self._svgroot()
+        # sort by zorder
+        elements = [k[1] for k in sorted(self.svgelements, key=lambda x: x[0])]
+        for elm in elements:
+            svg.append(elm)
+        return svg
+
+    def _svgroot(self) -> ET.Element:
+        ''' Get the <svg> element with everything except the drawn elements '''
         x0 = self.bbox.xmin * self.scale
         y0 = -self.bbox.ymax * self.scale
         if not self.svgcanvas:
             svg = ET.Element('svg')
+            for uri, prefix in sorted(self.namespaces.items(), key=lambda x: x[1]):
+                svg.set(f'xmlns:{prefix}', uri)
             svg.set('xmlns', 'http://www.w3.org/2000/svg')
             if self._need_xlink:
                 svg.set('xmlns:xlink', 'http://www.w3.org/1999/xlink')
@@ -624,6 +1011,10 @@ class Figure:
         else:
             svg = self.svgcanvas
 
+        if self.styles:
+            css = ET.SubElement(svg, 'style')
+            css.text = ''.join(f'.{name}{{{style}}}' for style, name in self.styles.items())
+
         if self.hatch:
             svg.append(ET.fromstring(hatchpattern))
 
@@ -641,11 +1032,6 @@ class Figure:
             rect.set('width', str((self.bbox.xmax-self.margin)*self.scale - (self.bbox.xmin+self.margin)*self.scale))
             rect.set('height', str(-(self.bbox.ymin+self.margin)*self.scale + (self.bbox.ymax-self.margin)*self.scale))
             rect.set('style', 'fill:none; stroke-width:1; stroke:red;')
-
-        # sort by zorder
-        elements = [k[1] for k in sorted(self.svgelements, key=lambda x: x[0])]
-        for elm in elements:
-            svg.append(elm)
         return svg
 
     def getimage(self, ext: str = 'svg') -> bytes:
@@ -653,12 +1039,25 @@ class Figure:
         if ext.lower() != 'svg':
             raise ValueError('SVG backend only supports generating SVG format figures.')
 
+        if self.stream:
+            f = io.StringIO()
+            self.write(f)
+            return f.getvalue().encode('utf-8')
+
         svg = self.getsvg()
         return ET.tostring(svg, encoding='utf-8')
 
     def clear(self) -> None:
         ''' Remove everything '''
         self.svgelements = []
+        self.styles = {}
+        for buffer in self.zbuffers.values():
+            buffer.close()
+        self.zbuffers = {}
+        self.namespaces = {}
+        self.openpaths = {}
+        self.symbolids = {}
+        self.imageids = {}
 
     def _repr_svg_(self):
         ''' SVG representation for Jupyter '''
@@ -671,8 +1070,8 @@ class Figure:
         ''' Show drawing in default program, if not inline in Jupyter '''
         if not inline:
             handle, path = tempfile.mkstemp(suffix='.svg')
-            with os.fdopen(handle, 'w') as f:
-                f.write(self.getimage().decode())
+            with os.fdopen(handle, 'w', encoding='utf-8') as f:
+                self.write(f)
 
             if sys.platform == 'win32':
                 os.startfile(path)
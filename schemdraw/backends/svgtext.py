@@ -14,6 +14,7 @@
 
 from __future__ import annotations
 
+from typing import Optional
 from xml.etree import ElementTree as ET
 import string
 import re
@@ -160,33 +161,86 @@ numsuperscripts = {
     '9': '⁹'}
 
 
-def replacelatex(text: str) -> str:
-    ''' Replace latex math codes with unicode equivalents '''
-    for k, v in textable.items():
-        text = re.sub(k, v, text)
-    return text
+# Single regex matching any of the textable keys, rebuilt when textable changes
+_latexpattern: Optional[re.Pattern] = None
+_latexvalues: dict[int, str] = {}  # Regex group index: replacement
+_latextable: dict[str, str] = {}  # Copy of textable the pattern was built from
 
+# Patterns for splitting out math markup
+SUPERSCRIPT_GROUP = re.compile(r'(\^\{.*?\})')
+SUPERSCRIPT_CHAR = re.compile(r'(\^.)')
+SUBSCRIPT_GROUP = re.compile(r'(\_\{.*?\})')
+SUBSCRIPT_CHAR = re.compile(r'(\_.)')
+SQRT = re.compile(r'(\\sqrt{.*})')
+OVERLINE = re.compile(r'(\\overline{.*})')
+MATH = re.compile(r'(\$.*?\$)')
 
-def mathtextsvg(text: str) -> ET.Element:
-    ''' Convert any math string delimited by $..$ into a <tspan> element
-        that can be used in <text>
 
-        Args:
-            text: The text to convert
+def _firstchar(pattern: str) -> str:
+    ''' Get the literal first character matched by the regex
+        pattern, or empty string if it is not a literal
     '''
-    text = text.replace('>', '&gt;').replace('<', '&lt;')
-    tokens = re.split(r'(\$.*?\$)', text)
-    svgtext = ''
-    for t in tokens:
-        if not (t.startswith('$') and t.endswith('$')):
-            svgtext += t
-            continue
+    if '|' in pattern:
+        return ''
+    if pattern[:1] == '\\':
+        c, rest = pattern[1:2], pattern[2:]
+        if c.isalnum():
+            return ''  # Character class such as \d
+    else:
+        c, rest = pattern[:1], pattern[1:]
+        if c in '.^$*+?{}[]()':
+            return ''
+    if rest[:1] in ('?', '*') or re.match(r'\{\d*,?\d*\}', rest):
+        return ''  # Character is optional
+    return c
+
+
+def _latex_pattern() -> tuple[re.Pattern, dict[int, str]]:
+    ''' Get the regex matching all textable keys, and replacements
+        by group index. Keys are tried in textable order, so the
+        result is the same as substituting each key in turn.
+    '''
+    global _latexpattern, _latexvalues, _latextable
+    if _latexpattern is None or _latextable != textable:
+        groups = []
+        values = {}
+        firstchars: Optional[set[str]] = set()
+        index = 1
+        for k, v in textable.items():
+            groups.append(f'({k})')
+            values[index] = v
+            index += re.compile(k).groups + 1
+            if firstchars is not None:
+                firstchars.add(_firstchar(k))
+                if '' in firstchars:
+                    firstchars = None
+
+        pattern = '|'.join(groups)
+        if firstchars:
+            # Lookahead skips positions that can't start any key, much
+            # faster than trying every alternative at every position
+            pattern = f'(?=[{"".join(re.escape(c) for c in sorted(firstchars))}])(?:{pattern})'
+        _latexpattern = re.compile(pattern)
+        _latexvalues = values
+        _latextable = dict(textable)
+    return _latexpattern, _latexvalues
+
 
-        t = t[1:-1]
-        t = replacelatex(t)
+def replacelatex(text: str) -> str:
+    ''' Replace latex math codes with unicode equivalents '''
+    pattern, values = _latex_pattern()
+    # The wrapping group of each key closes last, so is the lastindex
+    return pattern.sub(lambda m: values[m.lastindex], text)  # type: ignore
 
+
+def _mathtospan(t: str) -> str:
+    ''' Convert the contents of one $..$ math string to tspan markup '''
+    t = replacelatex(t)
+
+    # Each markup type is skipped unless its marker character is present
+    if '^' in t:
         # Find superscripts within {}
-        sups = re.split(r'(\^\{.*?\})', t)
+        sups = SUPERSCRIPT_GROUP.split(t)
         for sup in sups:
             if sup.startswith('^'):
                 chrs = sup[2:-1]
@@ -196,13 +250,14 @@ def mathtextsvg(text: str) -> ET.Element:
                 else:
                     t = t.replace(sup, f'<tspan baseline-shift="super" font-size="smaller">{chrs}</tspan>')
         # Find superscripts single char
-        sups = re.split(r'(\^.)', t)
+        sups = SUPERSCRIPT_CHAR.split(t)
         for sup in sups:
             if sup.startswith('^'):
                 t = t.replace(sup, f'<tspan baseline-shift="super" font-size="smaller">{sup[1]}</tspan>')
 
+    if '_' in t:
         # Find subscripts within {}
-        sups = re.split(r'(\_\{.*?\})', t)
+        sups = SUBSCRIPT_GROUP.split(t)
         for sup in sups:
             if sup.startswith('_'):
                 chrs = sup[2:-1]
@@ -212,28 +267,108 @@ def mathtextsvg(text: str) -> ET.Element:
                 else:
                     t = t.replace(sup, f'<tspan baseline-shift="sub" font-size="smaller">{chrs}</tspan>')
         # Find subscripts single char
-        sups = re.split(r'(\_.)', t)
+        sups = SUBSCRIPT_CHAR.split(t)
         for sup in sups:
             if sup.startswith('_'):
                 t = t.replace(sup, fr'<tspan baseline-shift="sub" font-size="smaller">{sup[1]}</tspan>')
 
-        # \sqrt
-        sups = re.split(r'(\\sqrt{.*})', t)
+    if '\\sqrt{' in t:
+        sups = SQRT.split(t)
         for sup in sups:
             if sup.startswith(r'\sqrt{'):
                 t = t.replace(sup, fr'√\overline{{{sup[6:-1]}}}')
 
-        # \overline
-        sups = re.split(r'(\\overline{.*})', t)
+    if '\\overline{' in t:
+        sups = OVERLINE.split(t)
         for sup in sups:
             if sup.startswith(r'\overline{'):
                 t = t.replace(sup, f'<tspan text-decoration="overline">{sup[10:-1]}</tspan>')
-        svgtext += t
+    return t
+
+
+def mathtextsvg(text: str) -> ET.Element:
+    ''' Convert any math string delimited by $..$ into a <tspan> element
+        that can be used in <text>
+
+        Args:
+            text: The text to convert
+    '''
+    text = text.replace('>', '&gt;').replace('<', '&lt;')
+    svgtext = ''
+    for t in MATH.split(text):
+        if not (t.startswith('$') and t.endswith('$')):
+            svgtext += t
+        else:
+            svgtext += _mathtospan(t[1:-1])
 
     svgtext = '<tspan>' + svgtext + '</tspan>'
     return ET.fromstring(svgtext)
 
 
+def _widthtable(groups: list[tuple[str, float]]) -> dict[str, float]:
+    ''' Build character: width lookup from groups of characters,
+        where the first group containing a character sets its width
+    '''
+    widths: dict[str, float] = {}
+    for chars, width in groups:
+        for c in chars:
+            widths.setdefault(c, width)
+    return widths
+
+
+# Character widths in thousandths of an inch at 12 point,
+# adapted from https://stackoverflow.com/a/16008023/13826284
+# Estimates based on Times Roman
+SERIF_WIDTHS = _widthtable([
+    ('lij:.,;t', 47),
+    ('|', 37),
+    ('![]fI/\\', 55),
+    ('`-(){}r', 60),
+    ('sJ°', 68),
+    ('"zcae?1', 74),
+    ('*^kvxyμbdhnopqug#$_α' + string.digits, 85),
+    ('#$+<>=~FSP', 95),
+    ('ELZT', 105),
+    ('BRC', 112),
+    ('DAwHUKVXYNQGO', 122),
+    ('&mΩ', 130),
+    ('%', 140),
+    ('MW@∠', 155)])
+
+# Arial, or other sans fonts
+SANS_WIDTHS = _widthtable([
+    ('lij|\' ', 37),
+    ('![]fI.,:;/\\t', 50),
+    ('`-(){}r"', 60),
+    ('*^zcsJkvxyμ°', 85),
+    ('aebdhnopqug#$L+<>=?_~FZTα' + string.digits, 95),
+    ('BSPEAKVXY&UwNRCHD', 112),
+    ('QGOMm%@Ω', 140),
+    ('W∠', 155)])
+
+# Font name: (character widths, width of other characters)
+fontwidths: dict[str, tuple[dict[str, float], float]] = {
+    'serif': (SERIF_WIDTHS, 60),
+    'sans': (SANS_WIDTHS, 75)}
+
+
+def register_font_widths(font: str, widths: dict[str, float], default: float = 500) -> None:
+    ''' Register character widths for estimating the size of text in a font,
+        used when ziamath is not installed or text is drawn as SVG <text>.
+
+        Args:
+            font: Font family name (not case sensitive)
+            widths: Dictionary of character: width, with widths in 1/1000
+                of the font size (the units used in AFM font metrics)
+            default: Width of characters not in widths
+    '''
+    # Convert to thousandths of an inch at 12 point
+    fontwidths[font.lower()] = ({c: w/6 for c, w in widths.items()}, default/6)
+
+    from .svg import clear_text_size_cache
+    clear_text_size_cache()
+
+
 def string_width(st: str, fontsize: float = 12, font: str = 'Arial') -> float:
     ''' Estimate string width based on individual characters
 
@@ -245,64 +380,17 @@ def string_width(st: str, fontsize: float = 12, font: str = 'Arial') -> float:
         Returns:
             Estimated width of string
     '''
-    # adapted from https://stackoverflow.com/a/16008023/13826284
     # The only alternative is to draw the string to an actual canvas
-
-    size = 0  # in milinches
-    if 'times' in font.lower() or ('serif' in font.lower() and 'sans' not in font.lower()):
-        # Estimates based on Times Roman
-        for s in st:
-            if s in 'lij:.,;t':
-                size += 47
-            elif s in '|':
-                size += 37
-            elif s in '![]fI/\\':
-                size += 55
-            elif s in '`-(){}r':
-                size += 60
-            elif s in 'sJ°':
-                size += 68
-            elif s in '"zcae?1':
-                size += 74
-            elif s in '*^kvxyμbdhnopqug#$_α' + string.digits:
-                size += 85
-            elif s in '#$+<>=~FSP':
-                size += 95
-            elif s in 'ELZT':
-                size += 105
-            elif s in 'BRC':
-                size += 112
-            elif s in 'DAwHUKVXYNQGO':
-                size += 122
-            elif s in '&mΩ':
-                size += 130
-            elif s in '%':
-                size += 140
-            elif s in 'MW@∠':
-                size += 155
-            else:
-                size += 60
-
-    else:  # Arial, or other sans fonts
-        for s in st:
-            if s in 'lij|\' ':
-                size += 37
-            elif s in '![]fI.,:;/\\t':
-                size += 50
-            elif s in '`-(){}r"':
-                size += 60
-            elif s in '*^zcsJkvxyμ°':
-                size += 85
-            elif s in 'aebdhnopqug#$L+<>=?_~FZTα' + string.digits:
-                size += 95
-            elif s in 'BSPEAKVXY&UwNRCHD':
-                size += 112
-            elif s in 'QGOMm%@Ω':
-                size += 140
-            elif s in 'W∠':
-                size += 155
-            else:
-                size += 75
+    fontname = font.lower()
+    if fontname in fontwidths:
+        widths, default = fontwidths[fontname]
+    elif 'times' in fontname or ('serif' in fontname and 'sans' not in fontname):
+        widths, default = fontwidths['serif']
+    else:
+        widths, default = fontwidths['sans']
+
+    getwidth = widths.get
+    size = sum([getwidth(s, default) for s in st])  # in milinches
     return size * 72 / 1000.0 * (fontsize/12)  # to points
 
 
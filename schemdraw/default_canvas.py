@@ -1,3 +1,6 @@
 ''' The default canvas to draw on '''
+from importlib.util import find_spec
 
-default_canvas = 'matplotlib'
+# Look for Matplotlib without importing it. The Matplotlib backend
+# (and pyplot) are only imported when something is drawn on it.
+default_canvas = 'matplotlib' if find_spec('matplotlib') is not None else 'svg'
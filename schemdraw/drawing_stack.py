@@ -22,6 +22,9 @@
 
     A `pause` attribute may be set True to prevent any stack operations.
     This may be used, for example, when adding elements to an ElementCompound.
+
+    Drawings and Containers keep a set of their elements so the
+    "added already" check in step 3 doesn't scan the element list.
 '''
 from __future__ import annotations
 from typing import Union, Optional, TYPE_CHECKING
@@ -49,7 +52,7 @@ def push_element(element: Optional['Element']) -> None:
         one if not already placed by the user
     '''
     if not pause and len(drawing_stack) > 0:
-        drawing, prev_elm = list(drawing_stack.items())[-1]
+        drawing, prev_elm = next(reversed(drawing_stack.items()))
         if prev_elm is not None and prev_elm not in drawing:
             drawing.add(prev_elm)
         drawing_stack[drawing] = element
@@ -1,4 +1,4 @@
-from .elements import Element, ElementDrawing, Element2Term
+from .elements import Element, ElementDrawing, Element2Term, prototypes
 from .container import Container
 from .twoterm import (Resistor, ResistorIEEE, ResistorIEC, ResistorVar, ResistorVarIEEE,
                       ResistorVarIEC, Thermistor, Photoresistor, PhotoresistorIEEE, PhotoresistorIEC,
@@ -26,6 +26,7 @@ from .lines import (Line, DataBusLine, Dot, Arrowhead, Arrow, DotDotDot, Wire, G
                     CurrentLabelInline, ZLabel, LoopCurrent, LoopArrow, Rect, Arc2, Arc3, ArcZ, ArcN, ArcLoop,
                     Annotate, Encircle, EncircleBox)
 from .connectors import OrthoLines, RightLines, Header, Jumper, BusConnect, BusLine, DB25, DB9, CoaxConnect, Plug, Jack, Terminal
+from . import compound
 from .compound import ElementCompound, Optocoupler, Relay, Rectifier, Wheatstone
 from .twoports import (ElementTwoport, TwoPort, VoltageTransactor, TransimpedanceTransactor, CurrentTransactor,
                        TransadmittanceTransactor, Nullor, VMCMPair)
@@ -85,3 +86,4 @@ def style(style):
     '''
     for name, element in style.items():
         globals()[name] = element
+    compound._setups.clear()  # Compound setups may use the restyled elements
@@ -1,16 +1,95 @@
 ''' Compound elements made from groups of other elements '''
 
 from __future__ import annotations
-from typing import Optional, Sequence, Union
+from typing import Any, Optional, Sequence, Union
+from collections import ChainMap
+from dataclasses import dataclass
+import copy
 
 from ..import elements as elm
 from ..types import Point
+from ..segments import SegmentType
 from .. import drawing_stack
+from . import elements as _elements
+from .elements import _BASE_ATTRS, _isplain
+
+SETUP_CACHE_SIZE = 256  # Stop adding setups when the cache is this full
+
+
+@dataclass
+class _Setup:
+    ''' Result of running an ElementCompound's setup '''
+    segments: tuple[SegmentType, ...]
+    anchors: dict[str, Any]
+    userparams: dict[str, Any]
+    elmparams: dict[str, Any]
+    elements: tuple[elm.Element, ...]
+    here: Point
+    theta: float
+    classes: tuple[type, ...]  # The compound class and each child class
+    defaults: list[list[dict[str, Any]]]  # Defaults of each class when captured
+
+    @classmethod
+    def capture(cls, compound: 'ElementCompound') -> '_Setup':
+        ''' Capture the state of a compound after setup '''
+        classes = (type(compound),) + tuple(type(e) for e in compound.elements)
+        return cls(tuple(copy.copy(s) for s in compound.segments), dict(compound.anchors),
+                   dict(compound._userparams), dict(compound.elmparams),
+                   tuple(_copyelement(e) for e in compound.elements), compound._here, compound._theta,
+                   classes, [[dict(m) for m in c.defaults.maps] for c in classes])  # type: ignore
+
+    def valid(self) -> bool:
+        ''' Class defaults have not changed since the setup was captured '''
+        return self.defaults == [c.defaults.maps for c in self.classes]  # type: ignore
+
+    def apply(self, compound: 'ElementCompound') -> None:
+        ''' Set up the compound from the captured state. Segments and
+            child elements are copied so each compound can modify its own.
+        '''
+        compound.segments = [copy.copy(s) for s in self.segments]
+        compound.anchors.update(self.anchors)
+        compound._userparams.update(self.userparams)
+        compound.elmparams.update(self.elmparams)
+        compound.elements = [_copyelement(e) for e in self.elements]
+        compound._here = self.here
+        compound._theta = self.theta
+
+
+# Setup results of compounds with _memoize set, keyed by class and arguments.
+# Filled only while enabled by `prototypes()`.
+_setups: dict[tuple, _Setup] = {}
+
+
+def _copyelement(element: elm.Element) -> elm.Element:
+    ''' Copy a placed element, with its own parameters, anchors, and segments '''
+    new = copy.copy(element)
+    new._userparams = dict(element._userparams)
+    new.elmparams = dict(element.elmparams)
+    new._dwgparams = dict(element._dwgparams)
+    new.params = ChainMap(new._userparams, new.elmparams, new.defaults, new._dwgparams)
+    new.anchors = dict(element.anchors)
+    new.absanchors = dict(element.absanchors)
+    new.segments = [copy.copy(s) for s in element.segments]
+    new._userlabels = list(element._userlabels)
+    new._bboxcache = {}
+    new._bboxstamp = None
+    new._sharedsegments = frozenset()
+    return new
+
+
+def _freeze(value: Any) -> Any:
+    ''' Convert lists to tuples so the value can key the setup cache '''
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
 
 
 class ElementCompound(elm.Element):
     ''' Element onto which other elements can be added like a drawing '''
+    _memoize = False  # Reuse setup results of earlier instances with the same arguments
+
     def __init__(self, **kwargs) -> None:
+        key = self._setupkey(kwargs) if self._memoize and _elements._useprototypes else None
         super().__init__(**kwargs)
         self.dwgparams = {'unit': kwargs.get('unit', 3),
                           'font': kwargs.get('font', None),
@@ -24,11 +103,30 @@ class ElementCompound(elm.Element):
         self._theta: float = 0
         self.elements: list[elm.Element] = []
 
+        if key is not None:
+            cached = _setups.get(key)
+            if cached is not None and cached.valid():
+                cached.apply(self)
+                return
+
         pause_state = drawing_stack.pause
         drawing_stack.pause = True
         self.setup()
         drawing_stack.pause = pause_state
 
+        if key is not None and (key in _setups or len(_setups) < SETUP_CACHE_SIZE):
+            _setups[key] = _Setup.capture(self)
+
+    def _setupkey(self, kwargs: dict[str, Any]) -> Optional[tuple]:
+        ''' Get the setup cache key from the constructor arguments and the
+            attributes set by the subclass, or None if they are not plain values
+        '''
+        attrs = tuple((k, _freeze(v)) for k, v in vars(self).items() if k not in _BASE_ATTRS)
+        args = tuple((k, _freeze(v)) for k, v in kwargs.items())
+        if not _isplain(attrs) or not _isplain(args):
+            return None
+        return (type(self), attrs, args)
+
     def __contains__(self, element):
         return element in self.elements
         
@@ -68,6 +166,8 @@ class Optocoupler(ElementCompound):
             * collector
             * base (if base==True)
     '''
+    _memoize = True
+
     def __init__(self, box: bool = True, boxfill: str = 'none',
                  boxpad: float = 0.2, base: bool = False, **kwargs):
         self.unit = 1.5
@@ -125,6 +225,8 @@ class Relay(ElementCompound):
             boxfill: Color to fill the box
             boxpad: Spacing between components and box
     '''
+    _memoize = True
+
     def __init__(self, unit: float = 2, cycl: bool = False, switch: str = 'spst',
                  core: bool = True, box: bool = True, boxfill: str = 'none',
                  boxpad: float = .25, swreverse: bool = False,
@@ -243,6 +345,8 @@ class Wheatstone(ElementCompound):
             * vo1 (if vout==True)
             * vo2 (if vout==True)
     '''
+    _memoize = True
+
     def __init__(self, vout: bool = False, labels: Optional[Sequence[str]] = None, **kwargs):
         self.vout = vout
         self.labels = labels
@@ -291,6 +395,8 @@ class Rectifier(ElementCompound):
             * E
             * W
     '''
+    _memoize = True
+
     def __init__(self, fill=False, labels=None, **kwargs):
         self.fill = fill
         self.labels = labels
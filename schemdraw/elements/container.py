@@ -39,6 +39,9 @@ class Container(Element):
         super().__init__()
         self.drawing = drawing
         self.elements: list[Element] = []
+        self._elementset: set[Element] = set()  # For fast `element in container`
+        self._elementsetcount = 0  # Length of self.elements when _elementset was updated
+        self._elementsetlast: Optional[Element] = None  # And its last element
 
     def container(self,
                   cornerradius: Optional[float] = None,
@@ -64,7 +67,11 @@ class Container(Element):
 
     def add(self, element: Element) -> 'Container':
         ''' Add an element to the container '''
+        self._sync_elementset()
         self.elements.append(element)
+        self._elementset.add(element)
+        self._elementsetcount = len(self.elements)
+        self._elementsetlast = element
         self.drawing.add(element)
         return self
 
@@ -77,7 +84,16 @@ class Container(Element):
         drawing_stack.pop_drawing(self)
 
     def __contains__(self, element):
-        return element in self.elements
+        self._sync_elementset()
+        return element in self._elementset
+
+    def _sync_elementset(self) -> None:
+        ''' Rebuild the membership set if self.elements was changed directly '''
+        last = self.elements[-1] if self.elements else None
+        if self._elementsetcount != len(self.elements) or self._elementsetlast is not last:
+            self._elementset = set(self.elements)
+            self._elementsetcount = len(self.elements)
+            self._elementsetlast = last
 
     def container_bbox(self, transform: bool = True) -> BBox:
         ''' Bounding box of the contents only '''
@@ -4,11 +4,13 @@ from __future__ import annotations
 from typing import Sequence, MutableMapping, Any, Union, Optional
 from collections import ChainMap
 from dataclasses import dataclass
+import functools
 import warnings
 import math
+import copy
 
 from .. import default_canvas
-from ..segments import Segment, SegmentText, SegmentCircle, BBox, SegmentType
+from ..segments import Segment, SegmentText, SegmentCircle, SegmentPoly, SegmentImage, SegmentDrawing, BBox, SegmentType
 from ..transform import Transform
 from .. import util
 from ..util import Point
@@ -17,14 +19,129 @@ from .. import drawing_stack
 from ..style import validate_color, validate_linestyle
 
 from ..backends.svg import Figure as svgFigure
-try:
-    from ..backends.mpl import Figure as mplFigure
-except ImportError:
-    mplFigure = None  # type: ignore
 
 
 gap = (math.nan, math.nan)  # Put a gap in a path
 
+# Element state built by constructors, keyed by class and arguments.
+# Filled only while enabled by `prototypes()`.
+_prototypes: dict[tuple, Optional['_Prototype']] = {}
+_useprototypes = False
+PROTOTYPE_CACHE_SIZE = 1024  # Stop adding prototypes when the cache is this full
+
+# Attributes set by Element.__init__. Constructors that set any other
+# attribute keep state the prototype can't restore, and are not cached.
+_BASE_ATTRS = frozenset(['_userparams', '_dwgparams', 'elmparams', 'params', '_localshift',
+                         '_userlabels', 'anchors', 'absanchors', 'segments', '_sharedsegments',
+                         'transform', '_positioned', '_bboxcache', '_bboxstamp'])
+
+
+def prototypes(enable: bool = True) -> None:
+    ''' Reuse the segments built by element constructors. Creating an
+        element with the same class and arguments as an earlier one
+        shares that element's segments instead of building new ones.
+        Shared segments are copied before flip, reverse, or lead extension
+        modifies them, but segments changed directly (for example
+        `element.segments[0].color = 'red'`) will change every element
+        sharing them.
+
+        Compound elements such as Relay also reuse the placement of
+        their child elements from an earlier instance with the same
+        arguments. Each compound gets its own copies of the segments
+        and child elements.
+
+        Args:
+            enable: Enable the cache. Disabling also empties it.
+    '''
+    global _useprototypes
+    _useprototypes = enable
+    if not enable:
+        _prototypes.clear()
+        from . import compound
+        compound._setups.clear()
+
+
+_PLAIN_TYPES = frozenset([str, int, float, bool, type(None)])
+
+
+def _isplain(value: Any) -> bool:
+    ''' Value is immutable and compares by value, so it can key the prototype cache '''
+    if type(value) in _PLAIN_TYPES:
+        return True
+    return isinstance(value, tuple) and all(map(_isplain, value))
+
+
+def _prototypekey(cls: type, args: tuple, kwargs: dict[str, Any]) -> Optional[tuple]:
+    ''' Get the prototype cache key for constructor arguments, or None if
+        the arguments are not plain values
+    '''
+    if not (_isplain(args) and all(map(_isplain, kwargs.values()))):
+        return None
+    return (cls, args, tuple(kwargs.items()))
+
+
+@dataclass
+class _Prototype:
+    ''' Element state left by a constructor, shared with later instances '''
+    defaults: list[dict[str, Any]]  # Class defaults when captured
+    userparams: dict[str, Any]
+    elmparams: dict[str, Any]
+    anchors: dict[str, Any]
+    segments: tuple
+    ids: frozenset[int]
+
+    @classmethod
+    def capture(cls, element: 'Element') -> Optional['_Prototype']:
+        ''' Capture the state of a newly constructed element, or None
+            if its constructor did more than build segments and anchors
+        '''
+        if (not set(vars(element)) <= _BASE_ATTRS or element._userlabels
+                or element._localshift != (0, 0) or element._dwgparams):
+            return None
+        segments = tuple(element.segments)
+        ids = frozenset(id(s) for s in segments)
+        element._sharedsegments = ids
+        return cls([dict(m) for m in element.defaults.maps],
+                   dict(element._userparams), dict(element.elmparams),
+                   dict(element.anchors), segments, ids)
+
+    def apply(self, element: 'Element') -> None:
+        ''' Set up a new element from the prototype '''
+        Element.__init__(element)
+        element._userparams.clear()
+        element._userparams.update(self.userparams)
+        element.elmparams.update(self.elmparams)
+        element.anchors.update(self.anchors)
+        element.segments = list(self.segments)
+        element._sharedsegments = self.ids
+
+
+def _prototyped(init):
+    ''' Wrap an Element subclass __init__ to use the prototype cache '''
+    @functools.wraps(init)
+    def wrapper(self, *args, **kwargs):
+        cls = type(self)
+        if not _useprototypes or cls.__init__ is not wrapper or not cls._prototype:
+            # Disabled, or called through super() by a subclass
+            init(self, *args, **kwargs)
+            return
+
+        key = _prototypekey(cls, args, kwargs)
+        if key is None:
+            init(self, *args, **kwargs)
+            return
+
+        prototype = _prototypes.get(key, ...)
+        if prototype is None:  # Constructor can't be skipped
+            init(self, *args, **kwargs)
+        elif prototype is not ... and prototype.defaults == cls.defaults.maps:
+            prototype.apply(self)
+        else:  # New arguments, or class defaults changed since captured
+            init(self, *args, **kwargs)
+            if prototype is not ... or len(_prototypes) < PROTOTYPE_CACHE_SIZE:
+                _prototypes[key] = _Prototype.capture(self)
+    return wrapper
+
 
 @dataclass
 class Label:
@@ -66,6 +183,14 @@ class Element:
     '''
     _element_defaults: dict[str, Any] = {}     # Default parameters for subclassed elements
     defaults: ChainMap[str, Any] = ChainMap()  # Subclasses will chainmap this with parents  
+    _prototype = True  # Constructor may be skipped by the prototype cache
+    _stylegeneration = 0  # Incremented when the style of any element changes
+    _styleversion = 0  # Value of _stylegeneration when this element's style last changed
+    # Parameter dicts, set in __new__
+    _userparams: dict[str, Any]
+    elmparams: dict[str, Any]
+    _dwgparams: dict[str, Any]
+    params: ChainMap[str, Any]
     def __init__(self, **kwargs) -> None:
         self._userparams.update(kwargs)         # Specified by user
         self._localshift: XY = Point((0, 0))
@@ -74,8 +199,11 @@ class Element:
         self.anchors: MutableMapping[str, Union[Point, tuple[float, float]]] = {}  # Untransformed anchors
         self.absanchors: MutableMapping[str, Any] = {}  # Transformed, absolute anchors
         self.segments: list[SegmentType] = []
+        self._sharedsegments: frozenset[int] = frozenset()  # ids of segments shared by the prototype cache
         self.transform = Transform(0, (0, 0))
         self._positioned = False  # Has the element been placed in a drawing via self._position()?
+        self._bboxcache: dict[tuple[bool, bool], BBox] = {}  # Cached get_bbox results
+        self._bboxstamp: Optional[tuple] = None  # Transform and segment list the cache is valid for
 
         if 'xy' in self._userparams:  # Allow legacy 'xy' parameter
             self._userparams.setdefault('at', self._userparams.pop('xy'))
@@ -103,6 +231,9 @@ class Element:
         else:
             self.defaults = ChainMap()
 
+        if '__init__' in vars(self):
+            self.__init__ = _prototyped(vars(self)['__init__'])  # type: ignore
+
     def __getattr__(self, name: str) -> Any:
         ''' Allow getting anchor position as attribute '''
         anchornames = ['start', 'end', 'center', 'istart', 'iend',
@@ -230,6 +361,7 @@ class Element:
         '''
         validate_color(color)
         self._userparams['color'] = color
+        self._stylechanged()
         return self
 
     def linestyle(self, ls: Linestyle) -> 'Element':
@@ -240,6 +372,7 @@ class Element:
         '''
         validate_linestyle(ls)
         self._userparams['ls'] = ls
+        self._stylechanged()
         return self
 
     def linewidth(self, lw: float) -> 'Element':
@@ -249,6 +382,7 @@ class Element:
                 lw: Line width
         '''
         self._userparams['lw'] = lw
+        self._stylechanged()
         return self
 
     def fill(self, color: bool | str = True) -> 'Element':
@@ -260,6 +394,7 @@ class Element:
         '''
         validate_color(color)
         self._userparams['fill'] = color
+        self._stylechanged()
         return self
 
     def style(self, color: Optional[str] = None, fill: Optional[str] = None,
@@ -287,8 +422,16 @@ class Element:
             lower zorder elements.
         '''
         self._userparams['zorder'] = zorder
+        self._stylechanged()
         return self
 
+    def _stylechanged(self) -> None:
+        ''' Note a style change, so Drawings that were already drawn
+            draw their elements again
+        '''
+        Element._stylegeneration += 1
+        self._styleversion = Element._stylegeneration
+
     def hold(self) -> 'Element':
         ''' Do not move the Drawing `here` position after placing this element '''
         self._userparams['move_cur'] = False
@@ -348,10 +491,11 @@ class Element:
     def _flipreverse(self) -> None:
         ''' Flip and/or reverse element's segments if necessary '''
         if self._userparams.get('flip', False):
-            for s in self.segments:
-                s.doflip()
+            for i in range(len(self.segments)):
+                self._ownsegment(i).doflip()
             for name, pt in self.anchors.items():
                 self.anchors[name] = Point(pt).flip()
+            self._clear_bbox_cache()
 
         if self._userparams.get('reverse', False):
             if 'center' in self.anchors:
@@ -359,9 +503,21 @@ class Element:
             else:
                 xmin, _, xmax, _ = self.get_bbox(includetext=False)
                 centerx = (xmin + xmax)/2
-            [s.doreverse(centerx) for s in self.segments]  # type: ignore
+            for i in range(len(self.segments)):
+                self._ownsegment(i).doreverse(centerx)  # type: ignore
             for name, pt in self.anchors.items():
                 self.anchors[name] = Point(pt).mirrorx(centerx)
+            self._clear_bbox_cache()
+
+    def _ownsegment(self, index: int) -> SegmentType:
+        ''' Get a segment for modifying, copying it first if it is
+            shared with other elements by the prototype cache
+        '''
+        segment = self.segments[index]
+        if id(segment) in self._sharedsegments:
+            segment = self.segments[index] = copy.copy(segment)
+        self._clear_bbox_cache()
+        return segment
 
     def _place(self, dwgxy: XY, dwgtheta: float, **dwgparams) -> tuple[Point, float]:
         ''' Calculate element position within the drawing
@@ -377,6 +533,7 @@ class Element:
         '''
         self._dwgparams.clear()  # Don't remove the original object so self.params ChainMap gets the new values.
         self._dwgparams.update(dwgparams)
+        self._clear_bbox_cache()  # Subclasses may have modified segments before calling _place
         if not self._positioned:
             self._position()
 
@@ -461,21 +618,46 @@ class Element:
 
             Returns:
                 Corners of the bounding box, (xmin, ymin, xmax, ymax)
+
+            The result is cached until the element is placed again or
+            its segments list changes. Style settings such as color
+            do not affect the bounding box. Modifying the points of a
+            segment in place, after the element is placed, is not detected;
+            replace the segment in `segments` instead.
         '''
+        stamp = (self.transform, id(self.segments), tuple(map(id, self.segments)))
+        if stamp != self._bboxstamp:
+            self._bboxcache.clear()
+            self._bboxstamp = stamp
+        elif (transform, includetext) in self._bboxcache:
+            return self._bboxcache[(transform, includetext)]
+
         xmin = ymin = math.inf
         xmax = ymax = -math.inf
         for segment in self.segments:
             if not includetext and isinstance(segment, SegmentText):
                 continue
-            if transform:
-                segment = segment.xform(self.transform)
-            segxmin, segymin, segxmax, segymax = segment.get_bbox()
+            if isinstance(segment, SegmentDrawing):
+                if transform:
+                    segxmin, segymin, segxmax, segymax = segment.get_xform_bbox(self.transform, includetext)
+                else:
+                    segxmin, segymin, segxmax, segymax = segment.get_bbox(includetext)
+            elif transform:
+                segxmin, segymin, segxmax, segymax = segment.get_xform_bbox(self.transform)
+            else:
+                segxmin, segymin, segxmax, segymax = segment.get_bbox()
             xmin = min(xmin, segxmin)
             xmax = max(xmax, segxmax)
             ymin = min(ymin, segymin)
             ymax = max(ymax, segymax)
 
-        return BBox(xmin, ymin, xmax, ymax)
+        bbox = BBox(xmin, ymin, xmax, ymax)
+        self._bboxcache[(transform, includetext)] = bbox
+        return bbox
+
+    def _clear_bbox_cache(self) -> None:
+        ''' Discard cached bounding boxes after the segments change '''
+        self._bboxstamp = None
 
     def _position_label(self, label: Label, theta: float = 0) -> Label:
         ''' Calculate position of label
@@ -703,6 +885,7 @@ class Element:
     def _draw_on_figure(self):
         ''' Draw the element on a new figure. Useful for _repr_ functions. '''
         if default_canvas.default_canvas == 'matplotlib':
+            from ..backends.mpl import Figure as mplFigure
             fig = mplFigure()
         else:
             fig = svgFigure(bbox=self.get_bbox(transform=True))
@@ -728,8 +911,26 @@ class Element:
         ''' Draw the element on a Figure '''
         if len(self.segments) == 0:
             self._place((0, 0), 0)
-        for segment in self.segments:
-            segment.draw(fig, self.transform, **self.params)
+        if isinstance(fig, svgFigure) and fig.usesymbols and self.transform.zoom == (1, 1):
+            # Shapes go in reusable SVG symbols. Text and images
+            # stay upright, and clip regions and hatch patterns are in
+            # drawing coordinates, so those are drawn separately. Each run of shapes between
+            # them is its own symbol, to keep the drawing order.
+            shapes: list[SegmentType] = []
+            for segment in _flatten(self.segments):
+                if (isinstance(segment, (SegmentText, SegmentImage)) or segment.clip is not None
+                        or (isinstance(segment, SegmentPoly) and segment.hatch)):
+                    if shapes:
+                        fig.addsymbol(shapes, self.transform, self.params)
+                        shapes = []
+                    segment.draw(fig, self.transform, **self.params)
+                else:
+                    shapes.append(segment)
+            if shapes:
+                fig.addsymbol(shapes, self.transform, self.params)
+        else:
+            for segment in self.segments:
+                segment.draw(fig, self.transform, **self.params)
 
         if self.params.get('elmbbox', False):
             # Draw element bounding box
@@ -739,16 +940,32 @@ class Element:
                      color='blue', lw=.5).draw(fig, self.transform)
 
 
+def _flatten(segments: Sequence[SegmentType]):
+    ''' Iterate segments, including the segments inside SegmentDrawings '''
+    for segment in segments:
+        if isinstance(segment, SegmentDrawing):
+            yield from _flatten(segment.segments)
+        else:
+            yield segment
+
+
 class ElementDrawing(Element):
     ''' Create an element from a Drawing
 
         Args:
             drawing: The Drawing instance to convert to an element
+            hierarchical: Reference the segments of the drawing, shared
+                with every other hierarchical ElementDrawing made from
+                it, instead of copying them into this element. Uses
+                less memory when the same drawing is added many times.
     '''
-    def __init__(self, drawing, **kwargs):
+    def __init__(self, drawing, hierarchical: bool = False, **kwargs):
         super().__init__(**kwargs)
         self.drawing = drawing
-        self.segments = self.drawing.get_segments()
+        if hierarchical:
+            self.segments = [SegmentDrawing(self.drawing._shared_segments())]
+        else:
+            self.segments = self.drawing.get_segments()
         self.anchors = self.drawing.anchors
         self.elmparams['drop'] = self.drawing._here
         self.elmparams['d'] = 'right'  # Reset drawing direction
@@ -921,9 +1138,10 @@ class Element2Term(Element):
                 start = Point(in_path[0]) - Point((lead_len, 0))
                 end = Point(in_path[-1]) + Point((lead_len, 0))
                 self._localshift = -start
-                self.segments[0].path = [start] + self.segments[0].path + [end]  # type: ignore
+                lead = self._ownsegment(0)
+                lead.path = [start] + lead.path + [end]  # type: ignore
                 if in_len > 0 and (leadcolor := self.params.get('leadcolor')):
-                    self.segments[0].color = leadcolor
+                    lead.color = leadcolor  # type: ignore
 
             else:
                 start = Point(in_path[0])
@@ -16,6 +16,8 @@ class ElementImage(Element):
             height: Height to draw image in Drawing
             xy: Origin (lower left corner)
     '''
+    _prototype = False  # Image file may change between instances
+
     def __init__(self, image: str | BinaryIO,
                  width: float,
                  height: float,
@@ -236,6 +236,7 @@ class Ic(Element):
 
     def _autopinlayout(self) -> None:
         ''' Determine pin layout when box size is specified '''
+        assert self.size is not None
         for side in ['L', 'R', 'T', 'B']:
             side = cast(Side, side)
             sideparam = replace(self.usersides.get(side, self._dflt_side))
@@ -399,7 +399,7 @@ class Connect(Box):
             w, h = self.params['minsize']
 
         if 'r' in self._userparams:
-            w = h = self._userparams.get('r')*2
+            w = h = self._userparams['r']*2
         self._userparams.setdefault('w', w)
         self._userparams.setdefault('h', h)
         return self._userparams['w'], self._userparams['h']
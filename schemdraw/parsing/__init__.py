@@ -1 +1 @@
-from .logic_parser import logicparse
\ No newline at end of file
+from .logic_parser import logicparse, logicparse_many
\ No newline at end of file
@@ -3,17 +3,18 @@ Layout of N-child Trees
 
 Source: Bill Mill
 https://llimllib.github.io/pymag-trees/
+
+Modified to run in linear time, without recursion, so very wide
+or very deep trees can be laid out.
 '''
 
 class DrawTree(object):
-    def __init__(self, tree, parent=None, depth=0, number=1):
+    def __init__(self, tree, parent=None, depth=0, number=1, subtree=True):
         self.x = -1.
         self.y = depth
         self.tree = tree
         self.node = tree.node
-        self.children = [DrawTree(c, self, depth+1, i+1) 
-                         for i, c
-                         in enumerate(tree.children)]
+        self.children = []
         self.parent = parent
         self.thread = None
         self.mod = 0
@@ -23,19 +24,29 @@ class DrawTree(object):
         #this is the number of the node in its group of siblings 1..n
         self.number = number
 
-    def left(self): 
+        if subtree:
+            # Build the DrawTrees of all descendants with a stack instead
+            # of recursion, since deep trees exceed the recursion limit
+            stack = [self]
+            while stack:
+                node = stack.pop()
+                node.children = [DrawTree(c, node, node.y+1, i+1, subtree=False)
+                                 for i, c
+                                 in enumerate(node.tree.children)]
+                stack.extend(node.children)
+
+    def left(self):
         return self.thread or len(self.children) and self.children[0]
 
     def right(self):
         return self.thread or len(self.children) and self.children[-1]
 
     def lbrother(self):
-        n = None
-        if self.parent:
-            for node in self.parent.children:
-                if node == self: return n
-                else:            n = node
-        return n
+        # Index by sibling number rather than searching the parent's
+        # children, which is quadratic for nodes with many children
+        if self.parent and self.number > 1:
+            return self.parent.children[self.number-2]
+        return None
 
     def get_lmost_sibling(self):
         if not self._lmost_sibling and self.parent and self != \
@@ -55,35 +66,51 @@ def buchheim(tree):
     return dt
 
 def third_walk(tree, n):
-    tree.x += n
-    for c in tree.children:
-        third_walk(c, n)
+    stack = [tree]
+    while stack:
+        v = stack.pop()
+        v.x += n
+        stack.extend(v.children)
 
 def firstwalk(v, distance=1.):
+    # Post-order walk with an explicit stack. Each frame is
+    # [node, index of next child to walk, default ancestor].
+    stack = [[v, 0, v.children[0] if v.children else None]]
+    while stack:
+        frame = stack[-1]
+        w, i = frame[0], frame[1]
+        if i < len(w.children):
+            frame[1] = i + 1
+            c = w.children[i]
+            stack.append([c, 0, c.children[0] if c.children else None])
+            continue
+
+        stack.pop()
+        place(w, distance)
+        if stack:
+            parent = stack[-1]
+            parent[2] = apportion(w, parent[2], distance)
+    return v
+
+def place(v, distance):
+    # Position v after all its children have been walked
     if len(v.children) == 0:
         if v.lmost_sibling:
             v.x = v.lbrother().x + distance
         else:
             v.x = 0.
     else:
-        default_ancestor = v.children[0]
-        for w in v.children:
-            firstwalk(w)
-            default_ancestor = apportion(w, default_ancestor, distance)
         #print("finished v =", v.tree, "children")
         execute_shifts(v)
 
         midpoint = (v.children[0].x + v.children[-1].x) / 2
 
-        ell = v.children[0]
-        arr = v.children[-1]
         w = v.lbrother()
         if w:
             v.x = w.x + distance
             v.mod = v.x - midpoint
         else:
             v.x = midpoint
-    return v
 
 def apportion(v, default_ancestor, distance):
     w = v.lbrother()
@@ -144,19 +171,23 @@ def ancestor(vil, v, default_ancestor):
     #the relevant text is at the bottom of page 7 of
     #"Improving Walker's Algorithm to Run in Linear Time" by Buchheim et al, (2002)
     #http://citeseerx.ist.psu.edu/viewdoc/download?doi=10.1.1.16.8757&rep=rep1&type=pdf
-    if vil.ancestor in v.parent.children:
+    # Same as `vil.ancestor in v.parent.children`, without scanning the list
+    if vil.ancestor.parent is v.parent:
         return vil.ancestor
     else:
         return default_ancestor
 
 def second_walk(v, m=0, depth=0, min=None):
-    v.x += m
-    v.y = depth
+    # Pre-order walk with an explicit stack of (node, modifier sum, depth)
+    stack = [(v, m, depth)]
+    while stack:
+        v, m, depth = stack.pop()
+        v.x += m
+        v.y = depth
 
-    if min is None or v.x < min:
-        min = v.x
+        if min is None or v.x < min:
+            min = v.x
 
-    for w in v.children:
-        min = second_walk(w, m + v.mod, depth+1, min)
+        stack.extend((w, m + v.mod, depth+1) for w in v.children)
 
-    return min
\ No newline at end of file
+    return min
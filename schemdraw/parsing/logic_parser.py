@@ -5,7 +5,9 @@ Example:
 >>> logicparse("a and (b or c)")
 
 '''
-from typing import Optional
+from __future__ import annotations
+from typing import Iterable, Optional
+from functools import lru_cache
 import pyparsing  # type: ignore
 
 from .. import schemdraw
@@ -31,8 +33,11 @@ class LogicTree():
         return len(self.children)
 
 
-def parse_string(logicstr):
-    ''' Parse the logic string using pyparsing '''
+@lru_cache(maxsize=None)
+def _grammar():
+    ''' Build the pyparsing grammar for logic expressions. Built on
+        first use and reused for every expression after that.
+    '''
     and_ = pyparsing.Keyword('and')
     or_ = pyparsing.Keyword('or')
     nor_ = pyparsing.Keyword('nor')
@@ -48,8 +53,6 @@ def parse_string(logicstr):
     xor_op = xor_ | xnor_ | '⊕' | '⊻'
     or_op = or_ | nor_ | '|' | '∨' | '+'
 
-    expr = pyparsing.Forward()
-
     identifier = ~(and_ | or_ | nand_ | nor_ | not_ | true_ | false_) + \
         pyparsing.Word('$' + pyparsing.alphas + '_', pyparsing.alphanums + '_' + '$')
 
@@ -58,23 +61,29 @@ def parse_string(logicstr):
                                     (and_op, 2, pyparsing.opAssoc.LEFT),
                                     (or_op, 2, pyparsing.opAssoc.LEFT),
                                     (xor_op, 2, pyparsing.opAssoc.LEFT)])
+    return expr
 
-    return expr.parseString(logicstr)[0]
 
+def parse_string(logicstr):
+    ''' Parse the logic string using pyparsing '''
+    return _grammar().parseString(logicstr)[0]
 
-def to_tree(pres):
-    ''' Convert the parsed logic expression into a LogicTree '''
+
+def _to_node(pres):
+    ''' Get the logic function and the parsed inputs of one node of
+        the parsed logic expression
+    '''
     invertfunc = False
 
     if pres[0] in ['not', '~', '¬']:
         if isinstance(pres[1], str):
-            return LogicTree('not', to_tree(pres[1]))
+            return 'not', [pres[1]]
         else:
             pres = pres[1]
             invertfunc = True
 
     if isinstance(pres, str):
-        return LogicTree(pres)
+        return pres, []
 
     func = pres[1]
     inputs = pres[::2]
@@ -88,7 +97,26 @@ def to_tree(pres):
                 'nand': 'and', 'nor': 'or', 'buf': 'not',
                 'xor': 'xnor', 'xnor': 'xor'}.get(func)
 
-    return LogicTree(func, *[to_tree(i) for i in inputs])
+    return func, inputs
+
+
+def to_tree(pres):
+    ''' Convert the parsed logic expression into a LogicTree '''
+    # Build the tree children-first with a stack instead of recursion,
+    # so deeply nested expressions don't exceed the recursion limit.
+    # Each entry is (function, parsed inputs, LogicTrees of inputs done so far).
+    stack = [(*_to_node(pres), [])]
+    while True:
+        func, inputs, children = stack[-1]
+        if len(children) < len(inputs):
+            stack.append((*_to_node(inputs[len(children)]), []))
+            continue
+
+        stack.pop()
+        tree = LogicTree(func, *children)
+        if not stack:
+            return tree
+        stack[-1][2].append(tree)
 
 
 def drawlogic(tree, gateH=.7, gateW=2, outlabel=None):
@@ -114,15 +142,20 @@ def drawlogic(tree, gateH=.7, gateW=2, outlabel=None):
 
     dtree = buchheim(tree)
 
-    def drawit(root, depth=0, outlabel=None):
-        ''' Recursive drawing function '''
-        elmdefs = {'and': logic.And,
-                   'or': logic.Or,
-                   'xor': logic.Xor,
-                   'nand': logic.Nand,
-                   'xnor': logic.Xnor,
-                   'nor': logic.Nor,
-                   'not': logic.Not}
+    elmdefs = {'and': logic.And,
+               'or': logic.Or,
+               'xor': logic.Xor,
+               'nand': logic.Nand,
+               'xnor': logic.Xnor,
+               'nor': logic.Nor,
+               'not': logic.Not}
+
+    def anchorname(elm, i):
+        ''' Name of the gate's anchor for input i '''
+        return 'start' if elm in [logic.Not, logic.Buf] else f'in{i+1}'
+
+    def drawgate(root, outlabel=None):
+        ''' Add the gate, with labels for its non-gate inputs '''
         elm = elmdefs.get(root.node, logic.And)
 
         x = root.y * -gateW   # buchheim draws vertical trees, so flip x-y.
@@ -132,22 +165,36 @@ def drawlogic(tree, gateH=.7, gateW=2, outlabel=None):
                 l=gateW, inputs=len(root.children))
         if outlabel:
             g.label(outlabel, loc='end')
-        
+
         for i, child in enumerate(root.children):
-            anchorname = 'start' if elm in [logic.Not, logic.Buf] else f'in{i+1}'
             if child.node not in elmdefs:
-                g.label(child.node, loc=anchorname)
+                g.label(child.node, loc=anchorname(elm, i))
 
         drawing.add(g)
-
-        for i, child in enumerate(root.children):
-            anchorname = 'start' if elm in [logic.Not, logic.Buf] else f'in{i+1}'
-            if child.node in elmdefs:
-                childelm = drawit(child, depth+1)  # recursive
-                drawing.add(RightLines(at=(g, anchorname), to=childelm.end))
         return g
 
-    drawit(dtree, outlabel=outlabel)
+    # Depth-first walk with a stack instead of recursion, so deep trees
+    # don't exceed the recursion limit. Each gate is added before its
+    # input gates, and the wire to an input gate after that gate's inputs.
+    # Stack entries are (tree node, its gate, next input) or a wire to add.
+    stack: list = [(dtree, drawgate(dtree, outlabel=outlabel), 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item[0], RightLines):
+            drawing.add(item[0])
+            continue
+
+        root, g, i = item
+        while i < len(root.children) and root.children[i].node not in elmdefs:
+            i += 1
+        if i == len(root.children):
+            continue
+
+        child = root.children[i]
+        stack.append((root, g, i+1))
+        childg = drawgate(child)
+        stack.append((RightLines(at=(g, anchorname(type(g), i)), to=childg.end),))
+        stack.append((child, childg, 0))
     return drawing
 
 
@@ -176,3 +223,24 @@ def logicparse(expr: str, gateW: float = 2, gateH: float = .75,
     tree = to_tree(parsed)
     drawing = drawlogic(tree, gateH=gateH, gateW=gateW, outlabel=outlabel)
     return drawing
+
+
+def logicparse_many(exprs: Iterable[str], gateW: float = 2, gateH: float = .75,
+                    outlabel: Optional[str] = None) -> list[schemdraw.Drawing]:
+    ''' Parse multiple logic string expressions, drawing each one in its
+        own schemdraw Drawing. Faster than calling logicparse in a loop
+        since the parser setup is shared.
+
+        Args:
+            exprs: Logic expressions
+            gateH: Height of one gate
+            gateW: Width of one gate
+            outlabel: Label for logic output of every drawing
+
+        Returns:
+            List of schemdraw.Drawing, one per expression
+    '''
+    grammar = _grammar()
+    return [drawlogic(to_tree(grammar.parseString(expr)[0]),
+                      gateH=gateH, gateW=gateW, outlabel=outlabel)
+            for expr in exprs]
@@ -6,6 +6,7 @@
 '''
 from __future__ import annotations
 from typing import Optional
+import os
 import re
 import warnings
 import zipfile
@@ -22,9 +23,17 @@ from .pictorial import parse_size_to_units
 FritzingInfo = namedtuple('FritzingInfo', 'author version title url label date description')
 
 
-def find_transforms(element, tree):
-    '''' Find all 'transform' tags in tree leading up to element '''
-    parents = {c: p for p in tree.iter() for c in p}
+def find_transforms(element, tree, parents: Optional[dict[ET.Element, ET.Element]] = None):
+    ''' Find all 'transform' tags in tree leading up to element
+
+        Args:
+            element: Element to find transforms of
+            tree: Root of the tree containing element
+            parents: Map of child to parent element for the tree. Built
+                from the tree if not provided.
+    '''
+    if parents is None:
+        parents = {c: p for p in tree.iter() for c in p}
     xforms = []
     def _find(elm):
         if (xf := elm.get('transform')):
@@ -46,49 +55,141 @@ def extract(elm: ET.Element, tag: str) -> Optional[str]:
 
 def fritz_parts(fname: str) -> list[str | None]:
     ''' List titles of all Fritzing parts in the file '''
-    zip = zipfile.ZipFile(fname)
-    parts = [f.filename for f in zip.infolist() if f.filename.endswith('.fzp')]
-    names = []
-    for part in parts:    
-        module = ET.fromstring(zip.read(part))
-        title = module.find('title')
-        if title is not None:
-            names.append(title.text)
-    return names
+    return list(FritzingArchive.load(fname).titles())
 
 
-class FritzingPart(ElementImage):
-    ''' Load a Fritzing Part File as a Schemdraw Element
-
-        Anchors will be extracted from the Part definition file.
-        Note some anchors are not valid Python identifiers and
-        therefore must be accessed through the Element.absanchors
-        dictionary rather than an attribute of the element instance.
+def anchor_position(name: str, anchorelm: ET.Element, imagexml: ET.Element,
+                    parents: dict[ET.Element, ET.Element]) -> tuple[Optional[float], Optional[float]]:
+    ''' Extract position of the anchor element from its SVG tag, in
+        SVG user units
 
         Args:
-            fname: Filename of fritzing .fzpz archive
-            partname: Name of part within the file. Use `listparts` to
-                show all names. If not provided, first part is drawn.
-            partidx: Index of part within the file. If not provided,
-                first part is drawn. Overrides `partname`.
-            scale: Scale factor
+            name: Connector name, for warnings
+            anchorelm: SVG element of the connector
+            imagexml: Root of the SVG
+            parents: Map of child to parent element for the SVG
     '''
-    def __init__(self, fname: str,
-                 partname: Optional[str] = None,
-                 partidx: Optional[int] = None,
-                 scale: float = 1.0):
-        self.fname = fname
-        self.zip = zipfile.ZipFile(self.fname)
-        parts = [f.filename for f in self.zip.infolist() if f.filename.endswith('.fzp')]
-
-        if partidx is not None:
-            part = parts[partidx]
-        elif partname is not None:
-            part = parts[fritz_parts(fname).index(partname)]
+    matrices: list[matrix.Matrix3x3] = []
+    anchorx: Optional[float] = None
+    anchory: Optional[float] = None
+
+    # Anchor is SVG tag, pick out the exact point
+    if anchorelm.tag.endswith('circle') or anchorelm.tag.endswith('ellipse'):
+        anchorx = float(anchorelm.get('cx', '0'))
+        anchory = float(anchorelm.get('cy', '0'))
+    elif anchorelm.tag.endswith('rect'):
+        rectwidth = float(anchorelm.get('width', '0'))
+        rectheight = float(anchorelm.get('height', '0'))
+        anchorx = float(anchorelm.get('x', '0')) + rectwidth/2
+        anchory = float(anchorelm.get('y', '0')) + rectheight/2
+    elif anchorelm.tag.endswith('polygon'):
+        pointlist = anchorelm.get('points', '')
+        pointstrs = re.split(',| ', pointlist)
+        points = [float(p) for p in pointstrs if p]
+        xpoints = points[::2]
+        ypoints = points[1::2]
+        anchorx = (max(xpoints) + min(xpoints)) / 2
+        anchory = (max(ypoints) + min(ypoints)) / 2
+    elif anchorelm.tag.endswith('path'):
+        path = anchorelm.get('d', '')
+        path = path.replace('-', ' -')  # Some negative numbers don't have space before
+        pointstrs = re.split(',| |M|L|H|V|Q|C|A|Z|m|l|h|v|q|c|a|z', path)
+        # First item in list is 'M' directive, or similar
+        # Let anchor just be the first point in the path.
+        # Could be that center of path was intended, but that will get weird
+        # with Bezier control points, etc.
+        # NOTE: relative (lowercase m) moves won't work correctly
+        pointstrs = [p for p in pointstrs if p]
+        anchorx = float(pointstrs[0])
+        anchory = float(pointstrs[1])
+    elif anchorelm.tag.endswith('g'):
+        # Set anchor based on first element within the group
+        if len(anchorelm) > 0:
+            return anchor_position(name, anchorelm[0], imagexml, parents)
         else:
-            part = parts[0]
+            warnings.warn(f'Connector {name} is empty')
+            return None, None
+    else:
+        warnings.warn(f'Connector {name} unimplemented connector tag: {anchorelm.tag}')
+        return None, None
+
+    # Pick out SVG transforms leading up to the anchor element
+    xforms = find_transforms(anchorelm, imagexml, parents)
+    for xf in xforms:
+        for xfmode, value in re.findall(r'(.*?)\((.*?)\)', xf):
+            xfmode = xfmode.strip()
+            valuestrs = re.split(',| ', value)
+            values = [float(v) for v in valuestrs if v]
+
+            if xfmode == 'translate':
+                m = matrix.matrix_translate(*values)
+            elif xfmode == 'rotate':
+                m = matrix.matrix_rotate(*values)
+            elif xfmode == 'scale':
+                m = matrix.matrix_scale(*values)
+            elif xfmode == 'skewX':
+                m = matrix.matrix_skewx(values[0])
+            elif xfmode == 'skewY':
+                m = matrix.matrix_skewy(values[0])
+            elif xfmode == 'matrix':
+                m = matrix.matrix(*values)
+            else:
+                raise NotImplementedError(f'Transform {xfmode} not implemented')
+            matrices.append(m)
+
+    # Apply the transformation matrices
+    return matrix.transform_all(Point((anchorx, anchory)), matrices)
+
 
-        self.module = ET.fromstring(self.zip.read(part))
+def find_anchors(module: ET.Element, imagexml: ET.Element) -> dict[str, tuple[float, float]]:
+    ''' Find connector positions of the part, in SVG user units.
+        The SVG is indexed once, rather than searched for each connector.
+
+        Args:
+            module: Root of the part (.fzp) definition
+            imagexml: Root of the part's breadboard SVG
+    '''
+    parents = {c: p for p in imagexml.iter() for c in p}
+    ids: dict[str, ET.Element] = {}
+    for elm in imagexml.iter():
+        if elm is not imagexml and (svgid := elm.get('id')) is not None:
+            ids.setdefault(svgid, elm)  # First in document order, like findall
+
+    anchors = {}
+    for connector in module.find('connectors'):  # type: ignore
+        name = connector.get('name')
+        if name is None:
+            continue  # Can't be referenced as an anchor
+        breadboard = connector.find('views').find('breadboardView')  # type: ignore
+        svgid = breadboard.find('p').get('svgId')  # type: ignore
+
+        anchorelm = ids.get(svgid)  # type: ignore
+        if anchorelm is None:
+            anchorelm = ids.get(f'{svgid}pin')
+
+        if anchorelm is None:
+            break
+
+        anchorx, anchory = anchor_position(name, anchorelm, imagexml, parents)  # type: ignore
+        if anchorx is not None and anchory is not None:
+            anchors[name] = (anchorx, anchory)
+    return anchors
+
+
+class FritzingPartData:
+    ''' Parsed contents of one part in a Fritzing file, shared by every
+        FritzingPart element made from it. The parsed XML trees must
+        not be modified.
+
+        Attributes:
+            module: Root of the part (.fzp) definition
+            info: Part information
+            image: Breadboard SVG image data
+            imagexml: Root of the breadboard SVG
+            anchors: Connector positions in SVG user units
+    '''
+    def __init__(self, zip: zipfile.ZipFile, part: str):
+        self.module = ET.fromstring(zip.read(part))
         self.info = FritzingInfo(
             author=extract(self.module, 'author'),
             version=extract(self.module, 'version'),
@@ -112,9 +213,118 @@ class FritzingPart(ElementImage):
             raise ValueError('Part breadboardView has no layers')
 
         svgfile = layers.get('image', '')
-        image = self.zip.read('svg.' + svgfile.replace('/', '.'))
-        imagebuf = BytesIO(image)
-        self.imagexml = ET.fromstring(image)
+        self.image = zip.read('svg.' + svgfile.replace('/', '.'))
+        self.imagexml = ET.fromstring(self.image)
+        self.anchors = find_anchors(self.module, self.imagexml)
+
+
+class FritzingArchive:
+    ''' Fritzing .fzpz or .fzbz file, with parts parsed on first use.
+        Use `FritzingArchive.load` to share one instance per file
+        until the file is modified.
+
+        Args:
+            fname: Filename of the archive
+    '''
+    _cache: dict[str, 'FritzingArchive'] = {}
+
+    def __init__(self, fname: str):
+        self.fname = fname
+        self.stamp = self._stamp(fname)
+        with zipfile.ZipFile(fname) as zip:
+            self.parts = [f.filename for f in zip.infolist() if f.filename.endswith('.fzp')]
+        self._titles: Optional[list[str | None]] = None
+        self._partdata: dict[str, FritzingPartData] = {}
+
+    @staticmethod
+    def _stamp(fname: str) -> tuple[int, int]:
+        ''' Modification time and size of the file '''
+        stat = os.stat(fname)
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def load(cls, fname: str) -> 'FritzingArchive':
+        ''' Get the archive for the file, reusing the cached one if
+            the file has not changed since it was loaded
+        '''
+        path = os.path.abspath(fname)
+        archive = cls._cache.get(path)
+        if archive is None or archive.stamp != cls._stamp(path):
+            archive = cls._cache[path] = cls(path)
+        return archive
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        ''' Forget all loaded archives '''
+        cls._cache.clear()
+
+    def titles(self) -> list[str | None]:
+        ''' Titles of all parts in the file '''
+        if self._titles is None:
+            self._titles = []
+            with zipfile.ZipFile(self.fname) as zip:
+                for part in self.parts:
+                    title = ET.fromstring(zip.read(part)).find('title')
+                    if title is not None:
+                        self._titles.append(title.text)
+        return self._titles
+
+    def part(self, part: str) -> FritzingPartData:
+        ''' Get the parsed part
+
+            Args:
+                part: Filename of the part (.fzp) within the archive
+        '''
+        if part not in self._partdata:
+            with zipfile.ZipFile(self.fname) as zip:
+                self._partdata[part] = FritzingPartData(zip, part)
+        return self._partdata[part]
+
+
+class FritzingPart(ElementImage):
+    ''' Load a Fritzing Part File as a Schemdraw Element
+
+        Anchors will be extracted from the Part definition file.
+        Note some anchors are not valid Python identifiers and
+        therefore must be accessed through the Element.absanchors
+        dictionary rather than an attribute of the element instance.
+
+        Args:
+            fname: Filename of fritzing .fzpz archive
+            partname: Name of part within the file. Use `listparts` to
+                show all names. If not provided, first part is drawn.
+            partidx: Index of part within the file. If not provided,
+                first part is drawn. Overrides `partname`.
+            scale: Scale factor
+
+        Attributes:
+            module: Root of the part (.fzp) definition XML
+            imagexml: Root of the breadboard SVG
+            info: Part information
+
+        The `module` and `imagexml` trees are shared by every
+        FritzingPart made from the same part file, and must not be modified.
+    '''
+    def __init__(self, fname: str,
+                 partname: Optional[str] = None,
+                 partidx: Optional[int] = None,
+                 scale: float = 1.0):
+        self.fname = fname
+        archive = FritzingArchive.load(fname)
+        parts = archive.parts
+
+        if partidx is not None:
+            part = parts[partidx]
+        elif partname is not None:
+            part = parts[archive.titles().index(partname)]
+        else:
+            part = parts[0]
+
+        partdata = archive.part(part)
+        self.module = partdata.module
+        self.info = partdata.info
+        self.imagexml = partdata.imagexml
+        imagebuf = BytesIO(partdata.image)
 
         width = self.imagexml.get('width', '0')
         height = self.imagexml.get('height', '0')
@@ -139,101 +349,16 @@ class FritzingPart(ElementImage):
             self._scale = self.width_units / width_f
 
         super().__init__(image=imagebuf, imgfmt='svg', width=self.width_units, height=self.height_units)
-        self._findanchors()
-
-    def _anchor_position(self, name: str, anchorelm: ET.Element) -> tuple[Optional[float], Optional[float]]:
-        ''' Extract position of the anchor element from its SVG tag '''
-        matrices: list[matrix.Matrix3x3] = []
-        anchorx: Optional[float] = None
-        anchory: Optional[float] = None
-
-        # Anchor is SVG tag, pick out the exact point
-        if anchorelm.tag.endswith('circle') or anchorelm.tag.endswith('ellipse'):
-            anchorx = float(anchorelm.get('cx', '0'))
-            anchory = float(anchorelm.get('cy', '0'))
-        elif anchorelm.tag.endswith('rect'):
-            rectwidth = float(anchorelm.get('width', '0'))
-            rectheight = float(anchorelm.get('height', '0'))
-            anchorx = float(anchorelm.get('x', '0')) + rectwidth/2
-            anchory = float(anchorelm.get('y', '0')) + rectheight/2
-        elif anchorelm.tag.endswith('polygon'):
-            pointlist = anchorelm.get('points', '')
-            pointstrs = re.split(',| ', pointlist)
-            points = [float(p) for p in pointstrs if p]
-            xpoints = points[::2]
-            ypoints = points[1::2]
-            anchorx = (max(xpoints) + min(xpoints)) / 2
-            anchory = (max(ypoints) + min(ypoints)) / 2
-        elif anchorelm.tag.endswith('path'):
-            path = anchorelm.get('d', '')
-            path = path.replace('-', ' -')  # Some negative numbers don't have space before
-            pointstrs = re.split(',| |M|L|H|V|Q|C|A|Z|m|l|h|v|q|c|a|z', path)
-            # First item in list is 'M' directive, or similar
-            # Let anchor just be the first point in the path.
-            # Could be that center of path was intended, but that will get weird
-            # with Bezier control points, etc.
-            # NOTE: relative (lowercase m) moves won't work correctly
-            pointstrs = [p for p in pointstrs if p]
-            anchorx = float(pointstrs[0])
-            anchory = float(pointstrs[1])
-        elif anchorelm.tag.endswith('g'):
-            # Set anchor based on first element within the group
-            if len(anchorelm) > 0:
-                return self._anchor_position(name, anchorelm[0])
-            else:
-                warnings.warn(f'Connector {name} is empty')
-                return None, None
-        else:
-            warnings.warn(f'Connector {name} unimplemented connector tag: {anchorelm.tag}')
-            return None, None
-
-        # Pick out SVG transforms leading up to the anchor element
-        xforms = find_transforms(anchorelm, self.imagexml)
-        for xf in xforms:
-            for xfmode, value in re.findall(r'(.*?)\((.*?)\)', xf):
-                xfmode = xfmode.strip()
-                valuestrs = re.split(',| ', value)
-                values = [float(v) for v in valuestrs if v]
-
-                if xfmode == 'translate':
-                    m = matrix.matrix_translate(*values)
-                elif xfmode == 'rotate':
-                    m = matrix.matrix_rotate(*values)
-                elif xfmode == 'scale':
-                    m = matrix.matrix_scale(*values)
-                elif xfmode == 'skewX':
-                    m = matrix.matrix_skewx(values[0])
-                elif xfmode == 'skewY':
-                    m = matrix.matrix_skewy(values[0])
-                elif xfmode == 'matrix':
-                    m = matrix.matrix(*values)
-                else:
-                    raise NotImplementedError(f'Transform {xfmode} not implemented')
-                matrices.append(m)
-
-        # Apply the transformation matrices and scale to drawing units
-        anchorx, anchory = matrix.transform_all(Point((anchorx, anchory)), matrices)
-        anchorx = anchorx * self._scale
-        anchory = self.height_units - anchory * self._scale
-        return anchorx, anchory
-
-    def _findanchors(self):
-        ''' Find anchor positions '''
-        for connector in self.module.find('connectors'):
-            name = connector.get('name')
-            breadboard = connector.find('views').find('breadboardView')
-            svgid = breadboard.find('p').get('svgId')
-
-            anchorelm = self.imagexml.findall(f".//*[@id='{svgid}']")
-            if len(anchorelm) == 0:
-                anchorelm = self.imagexml.findall(f".//*[@id='{svgid}pin']")
-
-            if len(anchorelm) == 0:
-                return
-
-            anchorelm = anchorelm[0]
-            anchorx, anchory = self._anchor_position(name, anchorelm)
-
-            if anchorx is not None and anchory is not None:
-                self.anchors[name] = Point((anchorx, anchory))
 
+        # Scale connector positions to drawing units
+        for name, (anchorx, anchory) in partdata.anchors.items():
+            self.anchors[name] = Point((anchorx * self._scale,
+                                        self.height_units - anchory * self._scale))
+
+    @property
+    def zip(self) -> zipfile.ZipFile:
+        ''' The Fritzing archive file, newly opened on each access.
+            The caller must close it, for example with
+            `with part.zip as z:`.
+        '''
+        return zipfile.ZipFile(self.fname)
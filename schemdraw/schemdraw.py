@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 from typing import Any, MutableMapping, Union, Optional, TYPE_CHECKING
-from collections import ChainMap
+from collections import ChainMap, namedtuple
 import warnings
 import math
+import os
 
 from . import default_canvas
 from .types import BBox, Backends, ImageFormat, Linestyle, XY, ImageType
@@ -12,26 +13,25 @@ from .elements import Element, Container
 from .segments import SegmentType
 from .util import Point
 from .backends.svg import Figure as svgFigure
+from .backends.measure import Figure as measureFigure
 from . import drawing_stack
 
 if TYPE_CHECKING:
     import xml.etree.ElementTree.Element  # type: ignore
-
-try:
+    import matplotlib.pyplot.Axes   # type: ignore
     from .backends.mpl import Figure as mplFigure
-    default_canvas.default_canvas = 'matplotlib'
-    if TYPE_CHECKING:
-        import matplotlib.pyplot.Axes   # type: ignore
-except ImportError:
-    mplFigure = None  # type: ignore
-    default_canvas.default_canvas = 'svg'
+
+
+RenderCacheInfo = namedtuple('RenderCacheInfo', ['hits', 'misses', 'currsize'])
 
 
 def use(backend: Backends = 'matplotlib') -> None:
     ''' Change default backend, either 'matplotlib' or 'svg' '''
     if backend == 'matplotlib':
-        if mplFigure is None:
-            raise ValueError('Could not import Matplotlib.')
+        try:
+            from .backends import mpl  # noqa: F401
+        except ImportError as exc:
+            raise ValueError('Could not import Matplotlib.') from exc
     default_canvas.default_canvas = backend
 
 
@@ -146,7 +146,8 @@ class Drawing:
         Args:
             canvas: Canvas to draw on when using Drawing context manager.
                 Can be string 'matplotlib' or 'svg' to create new canvas
-                with these backends, or an instance of a matplotlib axis,
+                with these backends, 'measure' to only compute element
+                geometry, or an instance of a matplotlib axis,
                 or an instance of xml.etree.ElementTree containing SVG.
                 Default is value set by schemdraw.use().
             file: optional filename to save on exiting context manager
@@ -175,6 +176,9 @@ class Drawing:
         self.show = show
         self.saveopts = {'transparent': transparent, 'dpi': dpi}
         self.elements: list[Element] = []
+        self._elementset: set[Element] = set()  # For fast `element in drawing`
+        self._elementsetcount = 0  # Length of self.elements when _elementset was updated
+        self._elementsetlast: Optional[Element] = None  # And its last element
         self.anchors: MutableMapping[str, Union[Point, tuple[float, float]]] = {}  # Untransformed anchors
 
         if 'backend' in kwargs:
@@ -190,7 +194,21 @@ class Drawing:
         self._theta: float = 0
         self._state: list[tuple[Point, float]] = []  # Push/Pop stack
         self._interactive = False
-        self.fig: Optional[Union[mplFigure, svgFigure]] = None
+        self.fig: Optional[Union[mplFigure, svgFigure, measureFigure]] = None
+        self._bbox = BBox(math.inf, math.inf, -math.inf, -math.inf)  # Running bbox of self.elements[:self._bboxcount]
+        self._bboxcount = 0
+        self._bboxlast: Optional[Element] = None
+        self._bboxhistory: list[BBox] = []  # Running bbox before each element, for undo
+        self._generation = 0  # Incremented when the drawing changes
+        self._stylegeneration = Element._stylegeneration  # Element styles the figure was drawn with
+        self._rendercache: dict[tuple, bytes] = {}  # (format, dpi, transparent): image data
+        self._rendercachegen = 0  # Generation and figure the cached images came from
+        self._rendercachefig: Optional[Union[mplFigure, svgFigure, measureFigure]] = None
+        self._renderhits = 0
+        self._rendermisses = 0
+        self._sharedsegments: tuple[SegmentType, ...] = ()  # Flattened segments shared by hierarchical ElementDrawings
+        # (generation, number of elements, latest element style change) of _sharedsegments
+        self._sharedsegmentsstamp: Optional[tuple[int, int, int]] = None
 
     @property
     def here(self):
@@ -254,27 +272,64 @@ class Drawing:
         raise AttributeError(f"'Drawing' has no attribute {name}")
 
     def __contains__(self, element):
-        return element in self.elements
+        self._sync_elementset()
+        return element in self._elementset
+
+    def _sync_elementset(self) -> None:
+        ''' Rebuild the membership set if self.elements was changed
+            directly, rather than through add and undo
+        '''
+        last = self.elements[-1] if self.elements else None
+        if self._elementsetcount != len(self.elements) or self._elementsetlast is not last:
+            self._elementset = set(self.elements)
+            self._mark_elementset()
+
+    def _mark_elementset(self) -> None:
+        ''' Note that _elementset matches self.elements '''
+        self._elementsetcount = len(self.elements)
+        self._elementsetlast = self.elements[-1] if self.elements else None
 
     def interactive(self, interactive: bool = True):
         ''' Enable interactive mode (matplotlib backend only). Matplotlib
             must also be set to interactive with `plt.ion()`.
+
+            Each added element draws only its own artists on the
+            figure, and `undo` removes only the artists of the last
+            element, so neither redraws the whole drawing.
         '''
         self._interactive = interactive
 
     def get_bbox(self) -> BBox:
-        ''' Get drawing bounding box '''
-        xmin = math.inf
-        xmax = -math.inf
-        ymin = math.inf
-        ymax = -math.inf
-        for element in self.elements:
-            bbox = element.get_bbox(transform=True)
-            xmin = min(bbox.xmin, xmin)
-            xmax = max(bbox.xmax, xmax)
-            ymin = min(bbox.ymin, ymin)
-            ymax = max(bbox.ymax, ymax)
-        return BBox(xmin, ymin, xmax, ymax)
+        ''' Get drawing bounding box
+
+            The box is extended as elements are added, and recomputed
+            when elements are removed. Segments of an element changed
+            after it was added are not included.
+        '''
+        if (self._bboxcount > len(self.elements) or
+                (self._bboxcount > 0 and self.elements[self._bboxcount-1] is not self._bboxlast)):
+            # Elements were removed, start over
+            self._reset_bbox()
+        for element in self.elements[self._bboxcount:]:
+            self._extend_bbox(element)
+        return self._bbox
+
+    def _reset_bbox(self) -> None:
+        ''' Clear the running bounding box, to be recomputed on next get_bbox '''
+        self._bbox = BBox(math.inf, math.inf, -math.inf, -math.inf)
+        self._bboxcount = 0
+        self._bboxhistory = []
+
+    def _extend_bbox(self, element: Element) -> None:
+        ''' Grow the running bounding box to include the element '''
+        bbox = element.get_bbox(transform=True)
+        self._bboxhistory.append(self._bbox)
+        self._bbox = BBox(min(bbox.xmin, self._bbox.xmin),
+                          min(bbox.ymin, self._bbox.ymin),
+                          max(bbox.xmax, self._bbox.xmax),
+                          max(bbox.ymax, self._bbox.ymax))
+        self._bboxcount += 1
+        self._bboxlast = element
 
     def get_segments(self) -> list[SegmentType]:
         ''' Get flattened list of all segments in the drawing '''
@@ -286,16 +341,83 @@ class Drawing:
                              for s in element.segments])
         return segments
 
+    def _shared_segments(self) -> tuple[SegmentType, ...]:
+        ''' Get flattened segments of the drawing, computed once
+            until the drawing changes and shared by every hierarchical
+            ElementDrawing made from it. The segments must not be modified.
+        '''
+        stamp = (self._generation, len(self.elements),
+                 max((element._styleversion for element in self.elements), default=0))
+        if stamp != self._sharedsegmentsstamp:
+            self._sharedsegments = tuple(self.get_segments())
+            self._sharedsegmentsstamp = stamp
+        return self._sharedsegments
+
     def _repr_svg_(self):
         ''' SVG representation for Jupyter '''
-        return self.draw(show=False).getimage('svg').decode()
+        if self.canvas == 'measure':
+            return None
+        self.draw(show=False)
+        return self._getimage('svg').decode()
 
     def _repr_png_(self):
         ''' PNG representation for Jupyter '''
         if self.canvas == 'matplotlib' or hasattr(self.canvas, 'plot'):
-            return self.draw(show=False).getimage('png')
+            self.draw(show=False)
+            return self._getimage('png')
         return None
 
+    def _changed(self, keepfig: bool = False) -> None:
+        ''' Mark the drawing as changed, so cached images are not reused
+
+            Args:
+                keepfig: Keep the existing figure, for callers that update
+                    the figure themselves. Otherwise the figure is drawn
+                    again when next needed.
+        '''
+        self._generation += 1
+        if not keepfig:
+            self.fig = None
+
+    def _checkstyle(self) -> None:
+        ''' Mark the drawing as changed if an element style was changed
+            since the drawing was last checked
+        '''
+        if self._stylegeneration != Element._stylegeneration:
+            self._stylegeneration = Element._stylegeneration
+            self._changed()
+
+    def _cachedimage(self, key: tuple) -> Optional[bytes]:
+        ''' Get image data from the render cache, or None if the drawing
+            or its figure changed since the image was rendered.
+        '''
+        if self._rendercachegen != self._generation or self._rendercachefig is not self.fig:
+            self._rendercache = {}
+            self._rendercachegen = self._generation
+            self._rendercachefig = self.fig
+        data = self._rendercache.get(key)
+        if data is None:
+            self._rendermisses += 1
+        else:
+            self._renderhits += 1
+        return data
+
+    def _getimage(self, fmt: str) -> bytes:
+        ''' Get image data from self.fig, using the render cache '''
+        key = (fmt.lower(), None, None)
+        data = self._cachedimage(key)
+        if data is None:
+            data = self.fig.getimage(ext=fmt)  # type: ignore
+            self._rendercache[key] = data
+        return data
+
+    def render_cache_info(self) -> RenderCacheInfo:
+        ''' Get hits, misses, and number of images in the render cache.
+            Images from `save`, `get_imagedata`, and Jupyter display are
+            reused until the drawing changes.
+        '''
+        return RenderCacheInfo(self._renderhits, self._rendermisses, len(self._rendercache))
+
     def __iadd__(self, element: Element):
         ''' In-place add element, via += operator. '''
         self.add(element)
@@ -308,19 +430,25 @@ class Drawing:
                 element: The element to add.
         '''
         self._here, self._theta = element._place(self._here, self._theta, **self.dwgparams)
+        self._sync_elementset()
         self.elements.append(element)
+        self._elementset.add(element)
+        self._mark_elementset()
+        self.get_bbox()  # Extend the running bounding box
+        self._changed(keepfig=self._interactive)
 
         if self._interactive:
             if self.fig is None:
+                from .backends.mpl import Figure as mplFigure
                 self.fig = mplFigure(
                     inches_per_unit=self.dwgparams.get('inches_per_unit'))
                 if 'bgcolor' in self.dwgparams:
                     self.fig.bgcolor(self.dwgparams['bgcolor'])
-            element._draw(self.fig)
+                for prev in self.elements[:-1]:
+                    self._drawinteractive(prev)
+            self._drawinteractive(element)
             self.fig.set_bbox(self.get_bbox())  # type: ignore
-            self.fig.getimage()  # type: ignore
-        else:
-            self.fig = None  # Clear any existing figure
+            self.fig.refresh()  # type: ignore
         return element
 
     def add_elements(self, *elements: Element) -> None:
@@ -328,16 +456,46 @@ class Drawing:
         for element in elements:
             self.add(element)
 
+    def _drawinteractive(self, element: Element) -> None:
+        ''' Draw the element on the interactive figure, recording
+            its artists so undo can remove them
+        '''
+        self.fig.startgroup()  # type: ignore
+        element._draw(self.fig)
+        self.fig.endgroup()  # type: ignore
+
     def undo(self) -> None:
         ''' Removes previously added element '''
-        self.elements.pop(-1)
-        self.fig.clear()  # type: ignore
-        for element in self.elements:
-            element._draw(self.fig)
+        self._sync_elementset()
+        element = self.elements.pop(-1)
+        if element not in self.elements:  # May have been added more than once
+            self._elementset.discard(element)
+        self._mark_elementset()
+        self._undo_bbox(element)
+        self._changed(keepfig=True)  # Figure is updated below
         self._here, self._theta = self.elements[-1].absdrop
+        if len(getattr(self.fig, 'groups', [])) == len(self.elements) + 1:
+            # Artists of each element are known, remove only the last ones
+            self.fig.removegroup()  # type: ignore
+            self.fig.set_bbox(self.get_bbox())  # type: ignore
+            self.fig.refresh()  # type: ignore
+            return
+
+        self.fig.clear()  # type: ignore
+        for prev in self.elements:
+            prev._draw(self.fig)
         self.fig.set_bbox(self.get_bbox())  # type: ignore
         self.fig.getimage()  # type: ignore
 
+    def _undo_bbox(self, element: Element) -> None:
+        ''' Update the running bounding box after removing the last element '''
+        if self._bboxcount == len(self.elements) + 1 and self._bboxlast is element:
+            self._bbox = self._bboxhistory.pop()
+            self._bboxcount -= 1
+            self._bboxlast = self.elements[-1] if self.elements else None
+        else:
+            self._reset_bbox()
+
     def move(self, dx: float = 0, dy: float = 0) -> None:
         ''' Move the current drawing position
 
@@ -347,6 +505,7 @@ class Drawing:
         '''
         drawing_stack.push_element(None)
         self._here = Point((self._here[0] + dx, self._here[1] + dy))
+        self._changed(keepfig=True)  # Nothing drawn changed
 
     def move_from(self, ref: Point, dx: float = 0, dy: float = 0, theta: Optional[float] = None) -> None:
         ''' Move drawing position relative to the reference point. Change drawing
@@ -356,6 +515,7 @@ class Drawing:
         self._here = (ref.x + dx, ref.y + dy)
         if theta is not None:
             self._theta = theta
+        self._changed(keepfig=True)  # Nothing drawn changed
 
     def set_anchor(self, name: str) -> None:
         ''' Define a Drawing anchor at the current drawing position '''
@@ -420,6 +580,7 @@ class Drawing:
             self.dwgparams['margin'] = margin
         if mathfont is not None:
             self.dwgparams['mathfont'] = mathfont
+        self._changed()
 
     def _drawelements(self):
         ''' Draw all the elements on self.fig '''
@@ -428,26 +589,35 @@ class Drawing:
 
     def _drawmpl(self, ax=None):
         ''' Draw on Matplotlib Axis '''
-        if self.fig is None or ax is not None:
+        from .backends.mpl import Figure as mplFigure
+        if not isinstance(self.fig, mplFigure) or ax is not None:
             self.fig = mplFigure(ax=ax,
                                  inches_per_unit=self.dwgparams.get('inches_per_unit'),
                                  margin=self.dwgparams['margin'],
                                  showbbox=self.dwgparams.get('dwgbbox', False))
             if 'bgcolor' in self.dwgparams:
                 self.fig.bgcolor(self.dwgparams['bgcolor'])
+            self._drawelements()
+        # An existing figure already has all the elements drawn
         self.fig.set_bbox(self.get_bbox())  # type: ignore
-        self._drawelements()
+        self.fig.flushbatch()  # type: ignore  # A user axis is not finished by getfig
 
     def _drawsvg(self, svg=None):
         ''' Draw on SVG canvas '''
-        if self.fig is None or svg is not None:
+        if not isinstance(self.fig, svgFigure) or svg is not None:
             self.fig = svgFigure(svg=svg, bbox=self.get_bbox(),
                                  inches_per_unit=self.dwgparams.get('inches_per_unit'),
                                  margin=self.dwgparams.get('margin'),
                                  showbbox=self.dwgparams.get('dwgbbox', False))
+            self._drawelements()
         if 'bgcolor' in self.dwgparams:
             self.fig.bgcolor(self.dwgparams['bgcolor'])
-        self._drawelements()
+
+    def _drawmeasure(self):
+        ''' Measure element geometry without drawing '''
+        self.fig = measureFigure(bbox=self.get_bbox())
+        for element in self.elements:
+            self.fig.add_element(element)
 
     def draw(self, show: bool = True,
              canvas=None, backend: Optional[Backends] = None):
@@ -456,7 +626,9 @@ class Drawing:
             Args:
                 show: Show the schematic in a GUI popup window (when
                     outside of a Jupyter inline environment)
-                canvas: 'matplotlib', 'svg', or Axis instance to draw on
+                canvas: 'matplotlib', 'svg', 'measure', or Axis instance to draw on.
+                    The 'measure' canvas does not render, but returns a Figure
+                    with the bounding box, anchors, and segments of each element.
                 backend (deprecated): 'matplotlib' or 'svg'
 
             Returns:
@@ -468,6 +640,7 @@ class Drawing:
             canvas = backend
 
         drawing_stack.push_element(None)
+        self._checkstyle()
 
         if canvas is None:
             canvas = self.canvas
@@ -480,6 +653,8 @@ class Drawing:
             self._drawmpl(ax=canvas)
         elif canvas == 'svg':
             self._drawsvg()
+        elif canvas == 'measure':
+            self._drawmeasure()
         else:
             self._drawsvg(canvas)
 
@@ -502,9 +677,22 @@ class Drawing:
                 transparent: Save as transparent background, if available
                 dpi: Dots-per-inch for raster formats
         '''
+        self._checkstyle()
         if self.fig is None:
             self.draw(show=False)
+
+        key = (os.path.splitext(fname)[1].lstrip('.').lower(), dpi, transparent)
+        data = self._cachedimage(key)
+        if data is not None:
+            with open(fname, 'wb') as f:
+                f.write(data)
+            return
+
         self.fig.save(fname, transparent=transparent, dpi=dpi)  # type: ignore
+        if not getattr(self.fig, 'stream', False):
+            # Streamed SVGs aren't held in memory
+            with open(fname, 'rb') as f:
+                self._rendercache[key] = f.read()
 
     def get_imagedata(self, fmt: ImageFormat | ImageType = 'svg') -> bytes:
         ''' Get image data as bytes array
@@ -518,6 +706,7 @@ class Drawing:
         '''
         if self.canvas == 'svg' and fmt.lower() != 'svg':
             raise ValueError('Format not available in SVG backend.')
+        self._checkstyle()
         if self.fig is None:
             self.draw(show=False)
-        return self.fig.getimage(ext=fmt)  # type: ignore
+        return self._getimage(fmt)
@@ -11,6 +11,7 @@ import math
 from .types import BBox, XY, Linestyle, Capstyle, Joinstyle, Arcdirection, EndRef, RotationMode, Halign, Valign
 from . import util
 from .util import Point
+from .transform import Transform
 from .backends import svg
 
 
@@ -77,6 +78,50 @@ def roundcorners(verts: Sequence[XY], radius: float = .5) -> Sequence[XY]:
     return poly
 
 
+def arc_bbox(center: XY, width: float, height: float,
+             theta1: float, theta2: float, angle: float = 0) -> BBox:
+    ''' Get bounding box of an elliptical arc
+
+        Args:
+            center: Center of the arc ellipse
+            width: Width of the arc ellipse
+            height: Height of the arc ellipse
+            theta1: Starting angle in degrees
+            theta2: Ending angle in degrees
+            angle: Rotation of the ellipse in degrees
+
+        Returns:
+            Bounding box limits (xmin, ymin, xmax, ymax)
+    '''
+    theta1, theta2 = math.radians(theta1), math.radians(theta2)
+    # the phi parameter in parametric form is not the same as the angle along ellipse
+    # (see https://www.petercollingridge.co.uk/tutorials/computational-geometry/finding-angle-around-ellipse/)
+    t1 = math.atan2(width*math.sin(theta1), height*math.cos(theta1))
+    t2 = math.atan2(width*math.sin(theta2), height*math.cos(theta2))
+    while t2 < t1:
+        t2 += 2*math.pi
+
+    phi = math.radians(angle)
+    cosphi = math.cos(phi)
+    sinphi = math.sin(phi)
+    rx = width/2
+    ry = height/2
+
+    # Extents are at the arc endpoints, or where dx/dt or dy/dt
+    # is zero if that point falls within the arc
+    tx = math.atan2(-ry*sinphi, rx*cosphi)
+    ty = math.atan2(ry*cosphi, rx*sinphi)
+    tt = [t1, t2]
+    for t in (tx, tx+math.pi, ty, ty+math.pi):
+        t = t1 + (t - t1) % (2*math.pi)
+        if t <= t2:
+            tt.append(t)
+
+    xx = [center[0] + rx*math.cos(t)*cosphi - ry*math.sin(t)*sinphi for t in tt]
+    yy = [center[1] + rx*math.cos(t)*sinphi + ry*math.sin(t)*cosphi for t in tt]
+    return BBox(min(xx), min(yy), max(xx), max(yy))
+
+
 class Segment:
     ''' A segment path
 
@@ -157,6 +202,20 @@ class Segment:
         y = [p[1] for p in self.path]
         return BBox(min(x), min(y)-hw, max(x), max(y)+hw)
 
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed Segment
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits: (xmin, ymin, xmax, ymax)
+        '''
+        hw = self.arrowwidth if self.arrow else 0
+        xmin, ymin, xmax, ymax = transform.extents(self.path)
+        return BBox(xmin, ymin-hw, xmax, ymax+hw)
+
     def doreverse(self, centerx: float) -> None:
         ''' Reverse the path (flip horizontal about the center of the path) '''
         self.path = [util.mirrorx(p, centerx) for p in self.path[::-1]]
@@ -346,6 +405,22 @@ class SegmentText:
             Returns:
                 Bounding box limits (xmin, ymin, xmax, ymax)
         '''
+        return self._bbox_at(self.xy)
+
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentText
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return self._bbox_at(transform.transform(self.xy))
+
+    def _bbox_at(self, xy: XY) -> BBox:
+        ''' Bounding box of the text placed at xy '''
         SCALE = 2/72
         w, h, dy = svg.text_size(self.text, font=self.font,
                                  mathfont=self.mathfont, size=self.fontsize)
@@ -355,8 +430,8 @@ class SegmentText:
         w *= SCALE
         h *= SCALE
         dy *= SCALE
-        x = self.xy[0]
-        y = self.xy[1]
+        x = xy[0]
+        y = xy[1]
         nlines = len(self.text.splitlines())
 
         if self.align is not None:
@@ -503,6 +578,18 @@ class SegmentPoly:
         y = [p[1] for p in self.verts]
         return BBox(min(x), min(y), max(x), max(y))
 
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentPoly
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return transform.extents(self.verts)
+
     def draw(self, fig, transform, **style) -> None:
         ''' Draw the segment
 
@@ -629,6 +716,27 @@ class SegmentCircle:
         ymax = self.center[1] + self.radius
         return BBox(xmin, ymin, xmax, ymax)
 
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentCircle
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        cx, cy = transform.transform(self.center)
+        if transform.zoom[0] == transform.zoom[1]:
+            radius = self.radius*transform.zoom[0]
+            return BBox(cx - radius, cy - radius, cx + radius, cy + radius)
+
+        # Asymmetric zoom makes circle into ellipse
+        return arc_bbox((cx, cy),
+                        width=self.radius*2*transform.zoom[0],
+                        height=self.radius*2*transform.zoom[1],
+                        theta1=0, theta2=360, angle=transform.theta)
+
     def draw(self, fig, transform, **style) -> None:
         ''' Draw the segment
 
@@ -754,6 +862,18 @@ class SegmentBezier:
         # This Might be too big, but will enclose the curve..
         return BBox(min(x), min(y), max(x), max(y))
 
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentBezier
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return transform.extents(self.p)
+
     def draw(self, fig, transform, **style) -> None:
         ''' Draw the segment
 
@@ -865,25 +985,24 @@ class SegmentArc:
             Returns:
                 Bounding box limits (xmin, ymin, xmax, ymax)
         '''
-        # Who wants to do trigonometry when we can just brute-force the bounding box?
-        theta1, theta2 = math.radians(self.theta1), math.radians(self.theta2)
-        # the phi parameter in parametric form is not the same as the angle along ellipse
-        # (see https://www.petercollingridge.co.uk/tutorials/computational-geometry/finding-angle-around-ellipse/)
-        t1 = math.atan2(self.width*math.sin(theta1), self.height*math.cos(theta1))
-        t2 = math.atan2(self.width*math.sin(theta2), self.height*math.cos(theta2))
-        while t2 < t1:
-            t2 += 2*math.pi
-        t = util.linspace(t1, t2, num=500)
-        sint = list(map(math.sin, t))
-        cost = list(map(math.cos, t))
-        phi = math.radians(self.angle)
-        cosphi = math.cos(phi)
-        sinphi = math.sin(phi)
-        rx = self.width/2
-        ry = self.height/2
-        xx = [self.center[0] + rx * ct*cosphi - ry * st*sinphi for st, ct in zip(sint, cost)]
-        yy = [self.center[1] + rx * ct*sinphi + ry * st*cosphi for st, ct in zip(sint, cost)]
-        return BBox(min(xx), min(yy), max(xx), max(yy))
+        return arc_bbox(self.center, self.width, self.height,
+                        self.theta1, self.theta2, self.angle)
+
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentArc
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return arc_bbox(transform.transform(self.center),
+                        self.width*transform.zoom[0],
+                        self.height*transform.zoom[1],
+                        self.theta1, self.theta2,
+                        self.angle + transform.theta)
 
     def draw(self, fig, transform, **style) -> None:
         ''' Draw the segment
@@ -973,6 +1092,18 @@ class SegmentPath:
         y = [p[1] for p in self.path if not isinstance(p, str)]
         return BBox(min(x), min(y), max(x), max(y))
 
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentPath
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits: (xmin, ymin, xmax, ymax)
+        '''
+        return transform.extents([p for p in self.path if not isinstance(p, str)])  # type: ignore
+
     def doreverse(self, centerx: float) -> None:
         ''' Reverse the path (flip horizontal about the center of the path) '''
         #self.path = [util.mirrorx(p, centerx) for p in self.path[::-1]]
@@ -1037,13 +1168,33 @@ class SegmentImage:
             Returns:
                 Bounding box limits (xmin, ymin, xmax, ymax)
         '''
-        if self.rotate % 360 == 0:
-            return BBox(self.xy.x, self.xy.y, self.xy.x+self.width, self.xy.y+self.height)
+        return self._bbox(self.xy, self.width, self.height, self.rotate)
+
+    def get_xform_bbox(self, transform) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without creating a transformed SegmentImage
+
+            Args:
+                transform: Transformation to apply
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return self._bbox(transform.transform(self.xy),
+                          self.width*transform.zoom[0],
+                          self.height*transform.zoom[1],
+                          self.rotate+transform.theta)
 
-        p1 = self.xy.rotate(self.rotate)
-        p2 = (self.xy + Point((self.width, 0))).rotate(self.rotate)
-        p3 = (self.xy + Point((self.width, self.height))).rotate(self.rotate)
-        p4 = (self.xy + Point((0, self.height))).rotate(self.rotate)
+    @staticmethod
+    def _bbox(xy: Point, width: float, height: float, rotate: float) -> BBox:
+        ''' Bounding box of the image with lower left corner at xy '''
+        if rotate % 360 == 0:
+            return BBox(xy.x, xy.y, xy.x+width, xy.y+height)
+
+        p1 = xy.rotate(rotate)
+        p2 = (xy + Point((width, 0))).rotate(rotate)
+        p3 = (xy + Point((width, height))).rotate(rotate)
+        p4 = (xy + Point((0, height))).rotate(rotate)
 
         return BBox(
             min(p.x for p in (p1, p2, p3, p4)),
@@ -1103,4 +1254,96 @@ class SegmentImage:
                   zorder=zorder)
 
 
-SegmentType = Union[Segment, SegmentText, SegmentPoly, SegmentArc, SegmentCircle, SegmentBezier, SegmentPath, SegmentImage]
+class SegmentDrawing:
+    ''' Segments of a Drawing, shared by every element made from
+        the Drawing rather than copied into each one
+
+        Args:
+            segments: Segments of the drawing, in drawing coordinates.
+                Shared segments are not modified. Flipping or
+                reversing makes copies first.
+    '''
+    def __init__(self, segments: Sequence['SegmentType']):
+        self.segments = segments
+        self.visible = True
+
+    def _bbox(self, bboxes) -> BBox:
+        ''' Union of the segment bounding boxes '''
+        xmin = ymin = math.inf
+        xmax = ymax = -math.inf
+        for bbox in bboxes:
+            xmin = min(xmin, bbox.xmin)
+            ymin = min(ymin, bbox.ymin)
+            xmax = max(xmax, bbox.xmax)
+            ymax = max(ymax, bbox.ymax)
+        return BBox(xmin, ymin, xmax, ymax)
+
+    def get_bbox(self, includetext: bool = True) -> BBox:
+        ''' Get bounding box (untransformed)
+
+            Args:
+                includetext: Include text segments in the bounding box
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return self._bbox(s.get_bbox() for s in self.segments
+                          if includetext or not isinstance(s, SegmentText))
+
+    def get_xform_bbox(self, transform, includetext: bool = True) -> BBox:
+        ''' Get bounding box after applying the transform,
+            without transforming the segments
+
+            Args:
+                transform: Transformation to apply
+                includetext: Include text segments in the bounding box
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        return self._bbox(s.get_xform_bbox(transform) for s in self.segments
+                          if includetext or not isinstance(s, SegmentText))
+
+    def xform(self, transform, **style) -> 'SegmentDrawing':
+        ''' Return a new SegmentDrawing with every segment
+            transformed to its global position
+
+            Args:
+                transform: Transformation to apply
+                style: Style parameters from Element to apply as default
+        '''
+        return SegmentDrawing([s.xform(transform, **style) for s in self.segments])
+
+    def _copysegments(self) -> None:
+        ''' Copy the shared segments before modifying them '''
+        identity = Transform(0, (0, 0))
+        self.segments = [s.xform(identity) for s in self.segments]
+
+    def doreverse(self, centerx: float) -> None:
+        ''' Reverse the segments (flip horizontal about centerx) '''
+        self._copysegments()
+        for s in self.segments:
+            s.doreverse(centerx)
+
+    def doflip(self) -> None:
+        ''' Vertically flip the segments '''
+        self._copysegments()
+        for s in self.segments:
+            s.doflip()
+
+    def draw(self, fig, transform, **style) -> None:
+        ''' Draw the segments
+
+            Args:
+                fig: schemdraw.Figure to draw on
+                transform: Transform to apply before drawing
+                style: Default style parameters
+        '''
+        if not self.visible:
+            return
+        for s in self.segments:
+            s.draw(fig, transform, **style)
+
+
+SegmentType = Union[Segment, SegmentText, SegmentPoly, SegmentArc, SegmentCircle,
+                    SegmentBezier, SegmentPath, SegmentImage, SegmentDrawing]
@@ -4,9 +4,20 @@
 
 from __future__ import annotations
 from typing import Sequence
+from itertools import chain
+from importlib.util import find_spec
+import math
 
 from .util import Point
-from .types import XY
+from .types import XY, BBox
+
+
+# Paths with fewer points than this are faster to transform in pure Python
+# than to convert to and from a numpy array.
+NUMPY_MIN_POINTS = 64
+
+# Numpy is only imported once a path that long is transformed
+HAVE_NUMPY = find_spec('numpy') is not None
 
 
 class Transform:
@@ -20,16 +31,28 @@ class Transform:
     '''
     def __init__(self, theta: float, globalshift: XY,
                  localshift: XY = (0, 0), zoom: XY | float = Point((1, 1))):
-        self.theta = theta
+        self._theta = theta
         self.shift = Point(globalshift)
         self.localshift = Point(localshift)
         if isinstance(zoom, (int, float)):
             zoom = Point((zoom, zoom))
         self.zoom = zoom
 
+        # Cache the rotation terms (same expressions as util.rotate)
+        # so every point doesn't recompute them
+        self._cos = math.cos(math.radians(theta))
+        self._sin = math.sin(math.radians(theta))
+
     def __repr__(self):
         return f'Transform: xy={self.shift}; theta={self.theta}; scale={self.zoom}; lshift={self.localshift}'
 
+    @property
+    def theta(self) -> float:
+        ''' Rotation angle in degrees. Read-only, since the rotation
+            terms are computed from it once.
+        '''
+        return self._theta
+
     def transform(self, pt: XY) -> Point:
         ''' Apply the transform to the point
 
@@ -39,7 +62,13 @@ class Transform:
             Returns:
                 Transformed (x, y) coordinates
         '''
-        return ((Point(pt) + self.localshift) * self.zoom).rotate(self.theta) + self.shift
+        # Equivalent to ((pt + localshift) * zoom).rotate(theta) + shift,
+        # with operations in the same order so results match exactly.
+        # The `+ 0` matches util.rotate, which turns -0.0 into 0.0.
+        x = (pt[0] + self.localshift[0]) * self.zoom[0]
+        y = (pt[1] + self.localshift[1]) * self.zoom[1]
+        return Point((x*self._cos + y*-self._sin + 0 + self.shift[0],
+                      x*self._sin + y*self._cos + 0 + self.shift[1]))
 
     def transform_array(self, pts: Sequence[XY]) -> list[Point]:
         ''' Apply the transform to multiple points
@@ -50,4 +79,48 @@ class Transform:
             Returns:
                 List of transformed (x, y) points
         '''
-        return [self.transform(pt) for pt in pts]
+        if not HAVE_NUMPY or len(pts) < NUMPY_MIN_POINTS:
+            return [self.transform(pt) for pt in pts]
+
+        import numpy as np  # type: ignore
+
+        # Same element-wise operations as transform(). A matmul could fuse
+        # multiply-adds and change the last digit of the results.
+        xy = np.fromiter(chain.from_iterable(pts), dtype=float, count=2*len(pts)).reshape(-1, 2)
+        xy = (xy + self.localshift) * self.zoom
+        out = np.empty_like(xy)
+        out[:, 0] = xy[:, 0]*self._cos + xy[:, 1]*-self._sin + 0 + self.shift[0]
+        out[:, 1] = xy[:, 0]*self._sin + xy[:, 1]*self._cos + 0 + self.shift[1]
+        return list(map(Point, out.tolist()))
+
+    def extents(self, pts: Sequence[XY]) -> BBox:
+        ''' Get bounding box of the points after applying the transform,
+            without creating the transformed points
+
+            Args:
+                pts: List of (x,y) points to transform
+
+            Returns:
+                Bounding box limits (xmin, ymin, xmax, ymax)
+        '''
+        lx, ly = self.localshift
+        zx, zy = self.zoom
+        sx, sy = self.shift
+        co, so = self._cos, self._sin
+        xmin = ymin = math.inf
+        xmax = ymax = -math.inf
+        for pt in pts:
+            # Same operations as transform()
+            x = (pt[0] + lx) * zx
+            y = (pt[1] + ly) * zy
+            xt = x*co + y*-so + 0 + sx
+            yt = x*so + y*co + 0 + sy
+            if xt < xmin:
+                xmin = xt
+            if xt > xmax:
+                xmax = xt
+            if yt < ymin:
+                ymin = yt
+            if yt > ymax:
+                ymax = yt
+        return BBox(xmin, ymin, xmax, ymax)
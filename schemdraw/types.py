@@ -31,7 +31,7 @@ HeaderStyle = Literal['round', 'square', 'screw']
 HeaderNumbering = Literal['lr', 'ud', 'ccw']
 XformTap = Literal['primary', 'secondary', 'left', 'right']
 
-Backends = Literal['svg', 'matplotlib']
+Backends = Literal['svg', 'matplotlib', 'measure']
 
 
 @unique